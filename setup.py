@@ -14,12 +14,24 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/dougfinl/sudokustepper",
     packages=["sudokustepper"],
+    # The baseline for the performance checks in sudokustepper.perf
+    package_data={"sudokustepper": ["perf_baseline.json"]},
+    # Optional compiled kernels; if they fail to build, the pure-Python implementations in kernels.py are used instead
+    ext_modules=[
+        setuptools.Extension("sudokustepper._speedups", ["sudokustepper/_speedups.c"], optional=True),
+    ],
     python_requires=">=3",
     install_requires=["PyQt5"],
+    extras_require={
+        "bulk": ["numpy"],
+    },
     entry_points={
         "gui_scripts": [
             "sudokustepper = sudokustepper.__main__:main",
         ],
+        "console_scripts": [
+            "sudokustepper-batch = sudokustepper.batch:main",
+        ],
     },
     classifiers=[
         "Programming Language :: Python :: 3",
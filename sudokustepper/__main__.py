@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
-from sudokustepper import gui
-
 
 def main():
+    # Qt and the compiled resources are only imported once the GUI is actually started, keeping the core modules
+    # (grid, solvers) free of any Qt import cost
+    from sudokustepper import gui
     gui.main()
 
 
@@ -0,0 +1,262 @@
+/*
+ * Compiled implementations of the kernels in sudokustepper/kernels.py, which remains the reference implementation.
+ * Every function here must return exactly what its pure-Python counterpart returns.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#define NUM_CELLS 81
+#define NUM_UNITS 27
+/* Must match kernels.CANCEL_CHECK_INTERVAL */
+#define CANCEL_CHECK_INTERVAL 1024
+
+static int units[NUM_UNITS][9];
+static int cell_units[NUM_CELLS][3];
+static int peers[NUM_CELLS][20];
+
+static void init_tables(void)
+{
+    for (int i = 0; i < 9; i++) {
+        int row_start = 3 * (i / 3);
+        int col_start = 3 * (i % 3);
+        for (int j = 0; j < 9; j++) {
+            units[i][j] = 9 * i + j;
+            units[9 + i][j] = 9 * j + i;
+            units[18 + i][j] = 9 * (row_start + j / 3) + col_start + j % 3;
+        }
+    }
+
+    for (int i = 0; i < NUM_CELLS; i++) {
+        cell_units[i][0] = i / 9;
+        cell_units[i][1] = 9 + i % 9;
+        cell_units[i][2] = 18 + 3 * (i / 27) + (i % 9) / 3;
+
+        int n = 0;
+        for (int k = 0; k < NUM_CELLS; k++) {
+            if (k != i && (k / 9 == i / 9 || k % 9 == i % 9 || (k / 27 == i / 27 && (k % 9) / 3 == (i % 9) / 3))) {
+                peers[i][n++] = k;
+            }
+        }
+    }
+}
+
+/* Copies the 81 raw values out of a bytes-like object, checking they are all between 0 and 9 */
+static int read_values(PyObject *obj, unsigned char *values)
+{
+    Py_buffer view;
+    if (PyObject_GetBuffer(obj, &view, PyBUF_SIMPLE) < 0) {
+        return -1;
+    }
+    if (view.len != NUM_CELLS) {
+        PyBuffer_Release(&view);
+        PyErr_SetString(PyExc_ValueError, "length of values must be 81");
+        return -1;
+    }
+    memcpy(values, view.buf, NUM_CELLS);
+    PyBuffer_Release(&view);
+
+    for (int i = 0; i < NUM_CELLS; i++) {
+        if (values[i] > 9) {
+            PyErr_SetString(PyExc_ValueError, "cell values must be between 0 and 9 inclusive");
+            return -1;
+        }
+    }
+    return 0;
+}
+
+static PyObject *find_conflicts(PyObject *self, PyObject *arg)
+{
+    unsigned char values[NUM_CELLS];
+    char conflicts[NUM_CELLS] = {0};
+    if (read_values(arg, values) < 0) {
+        return NULL;
+    }
+
+    for (int u = 0; u < NUM_UNITS; u++) {
+        int seen[10];
+        for (int v = 0; v < 10; v++) {
+            seen[v] = -1;
+        }
+        for (int j = 0; j < 9; j++) {
+            int k = units[u][j];
+            int value = values[k];
+            if (value == 0) {
+                continue;
+            }
+            if (seen[value] < 0) {
+                seen[value] = k;
+            } else {
+                conflicts[k] = 1;
+                conflicts[seen[value]] = 1;
+            }
+        }
+    }
+
+    return PyBytes_FromStringAndSize(conflicts, NUM_CELLS);
+}
+
+static PyObject *candidate_masks(PyObject *self, PyObject *arg)
+{
+    unsigned char values[NUM_CELLS];
+    int unit_masks[NUM_UNITS] = {0};
+    if (read_values(arg, values) < 0) {
+        return NULL;
+    }
+
+    for (int u = 0; u < NUM_UNITS; u++) {
+        for (int j = 0; j < 9; j++) {
+            int value = values[units[u][j]];
+            if (value) {
+                unit_masks[u] |= 1 << (value - 1);
+            }
+        }
+    }
+
+    PyObject *result = PyList_New(NUM_CELLS);
+    if (result == NULL) {
+        return NULL;
+    }
+    for (int i = 0; i < NUM_CELLS; i++) {
+        int used = unit_masks[cell_units[i][0]] | unit_masks[cell_units[i][1]] | unit_masks[cell_units[i][2]];
+        PyObject *mask = PyLong_FromLong(0x1ff & ~used);
+        if (mask == NULL) {
+            Py_DECREF(result);
+            return NULL;
+        }
+        PyList_SET_ITEM(result, i, mask);
+    }
+    return result;
+}
+
+struct search_state {
+    unsigned char grid[NUM_CELLS];
+    unsigned char first_solution[NUM_CELLS];
+    int have_solution;
+    long long limit;
+    long long num_solutions;
+    long long nodes;
+    long long backtracks;
+    /* The first byte of the cancel buffer, or NULL, and whether the search stopped for it */
+    volatile const unsigned char *cancel;
+    int cancelled;
+};
+
+/* Returns 1 if the search should stop */
+static int search_from(struct search_state *state, int start)
+{
+    int i = start;
+    while (i < NUM_CELLS && state->grid[i]) {
+        i++;
+    }
+    if (i == NUM_CELLS) {
+        if (!state->have_solution) {
+            memcpy(state->first_solution, state->grid, NUM_CELLS);
+            state->have_solution = 1;
+        }
+        state->num_solutions++;
+        return state->limit != 0 && state->num_solutions >= state->limit;
+    }
+
+    int used = 0;
+    for (int j = 0; j < 20; j++) {
+        used |= 1 << state->grid[peers[i][j]];
+    }
+    for (int value = 1; value <= 9; value++) {
+        if (used & (1 << value)) {
+            continue;
+        }
+        state->nodes++;
+        if (state->cancel != NULL && state->nodes % CANCEL_CHECK_INTERVAL == 0 && *state->cancel) {
+            state->cancelled = 1;
+            return 1;
+        }
+        state->grid[i] = (unsigned char)value;
+        if (search_from(state, i + 1)) {
+            return 1;
+        }
+    }
+
+    state->grid[i] = 0;
+    state->backtracks++;
+    return 0;
+}
+
+static PyObject *search(PyObject *self, PyObject *args)
+{
+    PyObject *values_obj;
+    long long limit = 1;
+    PyObject *cancel_obj = Py_None;
+    if (!PyArg_ParseTuple(args, "O|LO:search", &values_obj, &limit, &cancel_obj)) {
+        return NULL;
+    }
+
+    struct search_state state;
+    if (read_values(values_obj, state.grid) < 0) {
+        return NULL;
+    }
+    state.have_solution = 0;
+    state.limit = limit;
+    state.num_solutions = 0;
+    state.nodes = 0;
+    state.backtracks = 0;
+    state.cancel = NULL;
+    state.cancelled = 0;
+
+    Py_buffer cancel_view;
+    if (cancel_obj != Py_None) {
+        if (PyObject_GetBuffer(cancel_obj, &cancel_view, PyBUF_SIMPLE) < 0) {
+            return NULL;
+        }
+        if (cancel_view.len < 1) {
+            PyBuffer_Release(&cancel_view);
+            PyErr_SetString(PyExc_ValueError, "cancel must be at least one byte long");
+            return NULL;
+        }
+        state.cancel = (volatile const unsigned char *)cancel_view.buf;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    search_from(&state, 0);
+    Py_END_ALLOW_THREADS
+
+    if (cancel_obj != Py_None) {
+        PyBuffer_Release(&cancel_view);
+    }
+    if (state.cancelled) {
+        Py_RETURN_NONE;
+    }
+
+    PyObject *first_solution;
+    if (state.have_solution) {
+        first_solution = PyBytes_FromStringAndSize((const char *)state.first_solution, NUM_CELLS);
+        if (first_solution == NULL) {
+            return NULL;
+        }
+    } else {
+        first_solution = Py_None;
+        Py_INCREF(first_solution);
+    }
+    return Py_BuildValue("(NLLL)", first_solution, state.num_solutions, state.nodes, state.backtracks);
+}
+
+static PyMethodDef speedups_methods[] = {
+    {"find_conflicts", find_conflicts, METH_O, "Compiled implementation of kernels.py_find_conflicts."},
+    {"candidate_masks", candidate_masks, METH_O, "Compiled implementation of kernels.py_candidate_masks."},
+    {"search", search, METH_VARARGS, "Compiled implementation of kernels.py_search."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef speedups_module = {
+    PyModuleDef_HEAD_INIT,
+    "sudokustepper._speedups",
+    "Compiled implementations of the kernels in sudokustepper.kernels.",
+    -1,
+    speedups_methods
+};
+
+PyMODINIT_FUNC PyInit__speedups(void)
+{
+    init_tables();
+    return PyModule_Create(&speedups_module);
+}
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+"""
+Batch solving of many puzzles, streaming one result record per puzzle as JSON Lines or CSV.
+"""
+
+import argparse
+import csv
+import json
+import sys
+from abc import ABC, abstractmethod
+from typing import IO, Iterable, Optional
+
+from sudokustepper import kernels, solvers
+from sudokustepper.grid import Grid
+from sudokustepper.parse import describe_conflicts, parse_records, to_grid_string
+
+# The fields of each result record, in output order
+FIELDS = ("puzzle", "solution", "solver", "status", "steps", "backtracks", "restarts", "backjumps",
+          "candidate_lookups", "validations", "wall_time", "cpu_time", "peak_memory", "peak_rss", "memory_limit_action",
+          "line", "error")
+
+STATUS_SOLVED = "solved"
+STATUS_UNSOLVED = "unsolved"
+STATUS_INVALID = "invalid"
+STATUS_ERROR = "error"
+
+FORMATS = ("jsonl", "csv")
+
+# Output buffer size, in bytes
+BUFFER_SIZE = 1 << 16
+
+
+class ResultWriter(ABC):
+    """
+    Writes result records to a text stream, one at a time, without keeping them in memory.
+    """
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.num_records = 0
+
+    def write(self, record: dict) -> None:
+        self._write(record)
+        self.num_records += 1
+
+    @abstractmethod
+    def _write(self, record: dict) -> None:
+        """
+        Writes a single record to the stream. Implemented by each format.
+        """
+        pass
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class JsonLinesResultWriter(ResultWriter):
+    def _write(self, record: dict) -> None:
+        self.stream.write(json.dumps({field: record.get(field) for field in FIELDS}, separators=(",", ":")))
+        self.stream.write("\n")
+
+
+class CsvResultWriter(ResultWriter):
+    def __init__(self, stream: IO[str]):
+        super().__init__(stream)
+        self._writer = csv.DictWriter(stream, fieldnames=FIELDS, extrasaction="ignore", lineterminator="\n")
+        self._writer.writeheader()
+
+    def _write(self, record: dict) -> None:
+        self._writer.writerow(record)
+
+
+def create_result_writer(stream: IO[str], output_format: str) -> ResultWriter:
+    """
+    :param stream: the text stream to write to
+    :param output_format: one of FORMATS
+
+    :returns: a result writer for the format
+    """
+    if output_format == "jsonl":
+        return JsonLinesResultWriter(stream)
+    if output_format == "csv":
+        return CsvResultWriter(stream)
+    raise ValueError("output format must be one of {}".format(", ".join(FORMATS)))
+
+
+def solve_puzzle(puzzle: str, solver_name: str) -> dict:
+    """
+    Solves a single puzzle without recording steps. A malformed or invalid puzzle, or an exception raised by the
+    solver, gives a record with the error or invalid status and the reason in its error field.
+
+    :param puzzle: an 81-character grid string
+    :param solver_name: a key of solvers.ALL_SOLVERS
+
+    :returns: a result record, with the keys in FIELDS
+    """
+    record = dict.fromkeys(FIELDS)
+    record["puzzle"] = puzzle
+    record["solver"] = solver_name
+
+    try:
+        grid = Grid(puzzle)
+    except ValueError as e:
+        record["status"] = STATUS_ERROR
+        record["error"] = str(e)
+        return record
+
+    if not grid.valid:
+        record["status"] = STATUS_INVALID
+        record["error"] = describe_conflicts(kernels.find_conflicts(grid.values))
+        return record
+
+    try:
+        solver = solvers.ALL_SOLVERS.info(solver_name).create(grid, record_steps=False)
+        solved = solver.solve()
+    except Exception as e:
+        # A bug in one solver shouldn't stop the rest of the run
+        record["status"] = STATUS_ERROR
+        record["error"] = "{}: {}".format(type(e).__name__, e)
+        return record
+
+    record["status"] = STATUS_SOLVED if solved else STATUS_UNSOLVED
+    if solved:
+        record["solution"] = grid.grid_string
+    record.update((k, v) for k, v in solver.stats.as_dict().items() if k in FIELDS)
+    return record
+
+
+def run(lines: Iterable[str], writer: ResultWriter, solver_name: str) -> None:
+    """
+    Solves every puzzle in the input, in any of the formats accepted by parse.parse_records. A malformed puzzle gives a
+    record with the error status and message, and the puzzle as read, and doesn't stop the run.
+    """
+    for line_number, text, values, error in parse_records(lines, validate=False):
+        if error is None:
+            record = solve_puzzle(to_grid_string(values), solver_name)
+        else:
+            record = dict.fromkeys(FIELDS)
+            record["puzzle"] = text
+            record["solver"] = solver_name
+            record["status"] = STATUS_ERROR
+            record["error"] = error
+        record["line"] = line_number
+        writer.write(record)
+    writer.flush()
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Solve a file of puzzles, e.g. one 81-character grid string per line")
+    parser.add_argument("input", nargs="?", default="-", help="the puzzle file, or - for standard input")
+    parser.add_argument("-o", "--output", default="-", help="the result file, or - for standard output")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="jsonl", help="the result format")
+    parser.add_argument("-s", "--solver", choices=solvers.ALL_SOLVERS.names(grid_size=9), default="bitboard",
+                        help="the solver to use")
+    parser.add_argument("--save-model", action="store_true",
+                        help="with the portfolio solver, save its solve times to its latency model")
+    args = parser.parse_args(argv)
+
+    if args.save_model:
+        from sudokustepper import portfolio
+        portfolio.persist_default_model()
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, "r")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", buffering=BUFFER_SIZE, newline="")
+    try:
+        run(input_file, create_result_writer(output_file, args.format), args.solver)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+if __name__ == "__main__":
+    main()
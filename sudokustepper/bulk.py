@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Vectorised operations over many grids at once.
+
+Grids are represented as an (N, 81) integer array, one row per grid, with cells ordered left-to-right then
+top-to-bottom (the same order as Grid.grid_string) and 0 for empty cells.
+
+This module requires NumPy, which is an optional dependency (pip install sudokustepper[bulk]).
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+from sudokustepper.grid import UNITS
+
+
+# (27, 9) table of the cell indices in each row, column and box
+UNIT_INDICES = np.array(UNITS, dtype=np.intp)
+
+# Number of grids processed per chunk, bounding the size of the intermediate arrays
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def grids_from_strings(grid_strings: Iterable[str]) -> np.ndarray:
+    """
+    Converts 81-character grid strings (as produced by Grid.grid_string) into an (N, 81) array.
+
+    :param grid_strings: an iterable of grid strings made up of the digits 0-9
+
+    :returns: an (N, 81) array of dtype int8
+    """
+    data = "".join(grid_strings).encode("ascii")
+    if len(data) % 81 != 0:
+        raise ValueError("length of each grid string must be 81")
+    grids = np.frombuffer(data, dtype=np.uint8).reshape(-1, 81).astype(np.int8) - ord("0")
+    if grids.size and (grids.min() < 0 or grids.max() > 9):
+        raise ValueError("grid strings may only contain the digits 0-9")
+    return grids
+
+
+def _validate_chunk(grids: np.ndarray, conflicts: bool):
+    units = grids[:, UNIT_INDICES]  # (n, 27, 9)
+    valid = np.ones(len(grids), dtype=bool)
+    unit_conflicts = np.zeros(units.shape, dtype=bool) if conflicts else None
+
+    for digit in range(1, 10):
+        matches = units == digit
+        duplicated = matches.sum(axis=2) > 1  # (n, 27)
+        valid &= ~duplicated.any(axis=1)
+        if conflicts:
+            unit_conflicts |= matches & duplicated[:, :, np.newaxis]
+
+    solved = valid & (grids != 0).all(axis=1)
+
+    cell_conflicts = None
+    if conflicts:
+        cell_conflicts = np.zeros(grids.shape, dtype=bool)
+        for u in range(len(UNIT_INDICES)):
+            cell_conflicts[:, UNIT_INDICES[u]] |= unit_conflicts[:, u]
+
+    return valid, solved, cell_conflicts
+
+
+def validate_grids(grids, conflicts: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Validates many grids at once, following the same rules as Grid.validate: a grid is valid if no row, column or box
+    contains a repeated value, ignoring empty cells.
+
+    :param grids: an array-like of shape (N, 81) (or (N, 9, 9)) holding cell values between 0 and 9 inclusive
+    :param conflicts: set to True to also compute the per-cell conflict mask
+    :param chunk_size: the number of grids processed at a time, bounding peak memory use
+
+    :returns: a tuple (valid, solved) of boolean arrays of shape (N,), or (valid, solved, conflicts) if conflicts is
+              True, where conflicts is an (N, 81) boolean array flagging each cell that repeats a value in one of its
+              row, column or box (equivalent to Cell.valid being False)
+    """
+    grids = np.asarray(grids)
+    if grids.ndim == 1 or grids.shape[-2:] == (9, 9):
+        grids = grids.reshape(-1, 81)
+    if grids.ndim != 2 or grids.shape[1] != 81:
+        raise ValueError("grids must have shape (N, 81)")
+    if grids.size and (grids.min() < 0 or grids.max() > 9):
+        raise ValueError("cell values must be between 0 and 9 inclusive")
+    grids = grids.astype(np.int8, copy=False)
+
+    n = len(grids)
+    valid = np.empty(n, dtype=bool)
+    solved = np.empty(n, dtype=bool)
+    cell_conflicts = np.empty(grids.shape, dtype=bool) if conflicts else None
+
+    for start in range(0, n, chunk_size):
+        end = start + chunk_size
+        chunk_valid, chunk_solved, chunk_conflicts = _validate_chunk(grids[start:end], conflicts)
+        valid[start:end] = chunk_valid
+        solved[start:end] = chunk_solved
+        if conflicts:
+            cell_conflicts[start:end] = chunk_conflicts
+
+    if conflicts:
+        return valid, solved, cell_conflicts
+    return valid, solved
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+"""
+Differential testing of solvers: every solver is run on the same corpus of puzzles and checked against the reference
+BacktracingSolver. Any puzzle on which a solver disagrees is shrunk to a minimal reproduction.
+"""
+
+import argparse
+import os
+import random
+import sys
+import textwrap
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sudokustepper import kernels, solvers
+from sudokustepper.grid import PEERS, UNITS, Grid
+
+REFERENCE_SOLVER = "backtracing"
+
+# Number of puzzles sent to a worker process at a time
+CHUNK_SIZE = 64
+
+
+def _values(grid_string: str) -> bytes:
+    return bytes(int(c) for c in grid_string)
+
+
+def _grid_string(values) -> str:
+    return "".join(str(v) for v in values)
+
+
+def random_solution(rng: random.Random) -> bytearray:
+    """
+    Generates a random solved grid, by shuffling the digits, rows, columns, bands and stacks of a solution, and
+    optionally transposing it.
+    """
+    base = kernels.search(bytes(81))[0]
+    digits = list(range(1, 10))
+    rng.shuffle(digits)
+
+    def shuffled_lines():
+        bands = [0, 1, 2]
+        rng.shuffle(bands)
+        lines = []
+        for band in bands:
+            offsets = [0, 1, 2]
+            rng.shuffle(offsets)
+            lines += [3 * band + offset for offset in offsets]
+        return lines
+
+    rows = shuffled_lines()
+    cols = shuffled_lines()
+    transpose = rng.random() < 0.5
+    solution = bytearray(81)
+    for y in range(9):
+        for x in range(9):
+            src_y, src_x = (x, y) if transpose else (y, x)
+            solution[9 * y + x] = digits[base[9 * rows[src_y] + cols[src_x]] - 1]
+    return solution
+
+
+def generate_puzzle(rng: random.Random, min_clues: int = 24, max_clues: int = 40) -> str:
+    """
+    Generates a valid puzzle, with at least one solution but not necessarily a unique one.
+    """
+    puzzle = random_solution(rng)
+    for i in rng.sample(range(81), 81 - rng.randint(min_clues, max_clues)):
+        puzzle[i] = 0
+    return _grid_string(puzzle)
+
+
+def random_puzzle(rng: random.Random) -> str:
+    """
+    Generates a valid grid (without repeated values) which usually has no solution, by adding random non-conflicting
+    values to a generated puzzle.
+    """
+    puzzle = bytearray(_values(generate_puzzle(rng)))
+    for _ in range(rng.randint(1, 4)):
+        i = rng.choice([k for k in range(81) if puzzle[k] == 0])
+        used = {puzzle[k] for k in PEERS[i]}
+        choices = [d for d in range(1, 10) if d not in used]
+        if choices:
+            puzzle[i] = rng.choice(choices)
+    return _grid_string(puzzle)
+
+
+def corpus(num_puzzles: int, seed: int = 0, random_fraction: float = 0.25) -> Iterator[str]:
+    """
+    :param num_puzzles: the number of puzzles to generate
+    :param seed: the random seed, so that a corpus can be regenerated
+    :param random_fraction: the fraction of puzzles made by random_puzzle, the rest being made by generate_puzzle
+    """
+    rng = random.Random(seed)
+    for _ in range(num_puzzles):
+        yield random_puzzle(rng) if rng.random() < random_fraction else generate_puzzle(rng)
+
+
+def _solve(solver_name: str, puzzle: str) -> Tuple[Optional[str], float]:
+    grid = Grid(puzzle)
+    solver = solvers.ALL_SOLVERS.info(solver_name).create(grid, record_steps=False)
+    start = time.perf_counter()
+    solved = solver.solve()
+    elapsed = time.perf_counter() - start
+    return (grid.grid_string if solved else None), elapsed
+
+
+def _raised() -> str:
+    # Called while handling a solver's exception, which is reported as a disagreement so that it gets shrunk too
+    return "raised an exception\n" + textwrap.indent(traceback.format_exc().rstrip(), "    ")
+
+
+def _is_solution(puzzle: str, solution: str) -> bool:
+    if any(p != "0" and p != s for p, s in zip(puzzle, solution)):
+        return False
+    return all(len({solution[k] for k in unit}) == 9 for unit in UNITS) and "0" not in solution
+
+
+def _uniqueness(puzzle: str) -> int:
+    """
+    :returns: the number of solutions, capped at 2
+    """
+    return kernels.search(_values(puzzle), 2)[1]
+
+
+def _fast_reference(puzzle: str) -> Tuple[Optional[str], int]:
+    # kernels.search tries cells and values in the same order as the reference solver, so finds the same first solution
+    solution, num_solutions = kernels.search(_values(puzzle), 2)[:2]
+    return (None if solution is None else _grid_string(solution)), num_solutions
+
+
+def _compare(puzzle: str, solver_name: str, solution: Optional[str],
+             reference: Tuple[Optional[str], int]) -> Optional[str]:
+    reference_solution, num_solutions = reference
+    if (reference_solution is not None) != (num_solutions > 0):
+        return "reference solver and solution count disagree"
+    if solution is None:
+        if reference_solution is not None and solvers.ALL_SOLVERS[solver_name].complete:
+            return "no solution found, but the puzzle is solvable"
+        return None
+    if reference_solution is None:
+        return "found a solution, but the puzzle has none"
+    if not _is_solution(puzzle, solution):
+        return "solution is not a valid completion of the puzzle"
+    if num_solutions == 1 and solution != reference_solution:
+        return "solution differs from the unique solution"
+    return None
+
+
+def disagreement(puzzle: str, solver_name: str, reference: Tuple[Optional[str], int] = None) -> Optional[str]:
+    """
+    Checks a solver against the reference on one puzzle.
+
+    :param puzzle: the puzzle's grid string
+    :param solver_name: a key of solvers.ALL_SOLVERS
+    :param reference: the reference solution (or None) and number of solutions (capped at 2), if already known
+
+    :returns: a description of the disagreement, or None if the solver agrees with the reference
+    """
+    if reference is None:
+        reference = (_solve(REFERENCE_SOLVER, puzzle)[0], _uniqueness(puzzle))
+    try:
+        solution = _solve(solver_name, puzzle)[0]
+    except Exception:
+        return _raised()
+    return _compare(puzzle, solver_name, solution, reference)
+
+
+def shrink(puzzle: str, solver_name: str) -> str:
+    """
+    Removes clues from a puzzle one at a time, for as long as the solver still disagrees with the reference. This checks
+    many puzzles, so the reference results come from the search kernel rather than the (much slower) reference solver.
+
+    :returns: a puzzle which no single clue can be removed from without losing the disagreement
+    """
+    values = list(puzzle)
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for i in range(81):
+            if values[i] == "0":
+                continue
+            candidate = values[:i] + ["0"] + values[i + 1:]
+            candidate_puzzle = "".join(candidate)
+            if disagreement(candidate_puzzle, solver_name, _fast_reference(candidate_puzzle)) is not None:
+                values = candidate
+                shrunk = True
+    return "".join(values)
+
+
+def check_puzzles(puzzles: List[str], solver_names: List[str]) -> Tuple[Dict[str, float], List[tuple]]:
+    """
+    Worker entry point: checks every solver on each of the puzzles. A solver raising an exception counts as a
+    disagreement, rather than ending the run.
+
+    :returns: a tuple (total solve time per solver, disagreements as (puzzle, solver name, description) tuples)
+    """
+    times = dict.fromkeys([REFERENCE_SOLVER] + solver_names, 0.0)
+    disagreements = []
+    for puzzle in puzzles:
+        try:
+            reference_solution, elapsed = _solve(REFERENCE_SOLVER, puzzle)
+        except Exception:
+            # Nothing to compare the other solvers against
+            disagreements.append((puzzle, REFERENCE_SOLVER, _raised()))
+            continue
+        times[REFERENCE_SOLVER] += elapsed
+        reference = (reference_solution, _uniqueness(puzzle))
+
+        for solver_name in solver_names:
+            try:
+                solution, elapsed = _solve(solver_name, puzzle)
+            except Exception:
+                disagreements.append((puzzle, solver_name, _raised()))
+                continue
+            times[solver_name] += elapsed
+            description = _compare(puzzle, solver_name, solution, reference)
+            if description is not None:
+                disagreements.append((puzzle, solver_name, description))
+    return times, disagreements
+
+
+def _chunks(puzzles: Iterator[str], size: int) -> Iterator[List[str]]:
+    chunk = []
+    for puzzle in puzzles:
+        chunk.append(puzzle)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run(puzzles: Iterator[str], solver_names: List[str], processes: int = None, out=sys.stdout) -> bool:
+    """
+    Checks every solver on the puzzles in a process pool, then prints a report of throughput and any disagreements,
+    each shrunk to a minimal reproduction.
+
+    :returns: True if every solver agreed with the reference on every puzzle
+    """
+    solver_names = [name for name in solver_names if name != REFERENCE_SOLVER]
+    times = dict.fromkeys([REFERENCE_SOLVER] + solver_names, 0.0)
+    disagreements = []
+    num_puzzles = 0
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1) as executor:
+        chunks = list(_chunks(puzzles, CHUNK_SIZE))
+        for chunk, (chunk_times, chunk_disagreements) in zip(
+                chunks, executor.map(check_puzzles, chunks, [solver_names] * len(chunks))):
+            num_puzzles += len(chunk)
+            for name, elapsed in chunk_times.items():
+                times[name] += elapsed
+            disagreements += chunk_disagreements
+    elapsed = time.perf_counter() - start
+
+    print("Checked {} puzzles in {:.1f} s ({:.0f} puzzles/s)".format(
+        num_puzzles, elapsed, num_puzzles / elapsed if elapsed else 0), file=out)
+    print("{:<16} {:>12} {:>14} {:>10}".format("solver", "total (s)", "puzzles/s", "speedup"), file=out)
+    for name, total in times.items():
+        print("{:<16} {:>12.3f} {:>14.0f} {:>9.2f}x".format(
+            name, total, num_puzzles / total if total else 0, times[REFERENCE_SOLVER] / total if total else 0),
+            file=out)
+
+    for puzzle, solver_name, description in disagreements:
+        print("\n{} disagrees with {}: {}".format(solver_name, REFERENCE_SOLVER, description), file=out)
+        print("  puzzle:  {}".format(puzzle), file=out)
+        print("  minimal: {}".format(shrink(puzzle, solver_name)), file=out)
+
+    return not disagreements
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Check that every solver agrees with the reference solver")
+    parser.add_argument("-n", "--num-puzzles", type=int, default=1000, help="the number of puzzles to generate")
+    parser.add_argument("--seed", type=int, default=0, help="the random seed for the puzzle corpus")
+    parser.add_argument("-i", "--input", help="a file of puzzles to check, one per line, instead of generating them")
+    # Parallel solvers are left out by default, since the puzzles are already spread across processes, as are slow ones
+    parser.add_argument("-s", "--solvers", nargs="+", choices=solvers.ALL_SOLVERS.names(grid_size=9),
+                        default=solvers.ALL_SOLVERS.names(parallel=False, slow=False, grid_size=9),
+                        help="the solvers to check")
+    parser.add_argument("-p", "--processes", type=int, help="the number of worker processes")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input, "r") as f:
+            puzzles = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        puzzles = corpus(args.num_puzzles, args.seed)
+
+    if not run(puzzles, args.solvers, args.processes):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,42 @@
 # -*- coding: utf-8 -*-
 
-from typing import List
+from typing import List, Optional, Tuple
+
+
+def _build_units() -> Tuple[Tuple[int, ...], ...]:
+    rows = [tuple(9 * i + j for j in range(9)) for i in range(9)]
+    cols = [tuple(9 * j + i for j in range(9)) for i in range(9)]
+    boxes = []
+    for i in range(9):
+        row_start = 3 * (i // 3)
+        col_start = 3 * (i % 3)
+        boxes.append(tuple(9 * r + c for r in range(row_start, row_start + 3) for c in range(col_start, col_start + 3)))
+    return tuple(rows + cols + boxes)
+
+
+# Cells are indexed from 0 to 80, left-to-right then top-to-bottom, so the cell at (x, y) has index 9 * y + x.
+
+# The 27 units of the grid: rows (0-8, top to bottom), then columns (9-17, left to right), then boxes (18-26, top-left
+# to bottom-right). Each unit is a tuple of 9 cell indices.
+UNITS = _build_units()
+
+# For each cell, the indices of its row, column and box in UNITS
+CELL_UNITS = tuple((i // 9, 9 + i % 9, 18 + 3 * (i // 27) + (i % 9) // 3) for i in range(81))
+
+# For each cell, the indices of the 20 other cells sharing a row, column or box with it
+PEERS = tuple(
+    tuple(sorted(set(k for u in CELL_UNITS[i] for k in UNITS[u]) - {i}))
+    for i in range(81)
+)
+
+# Candidate sets are stored as 9-bit masks, where bit (d - 1) is set if the digit d is a candidate
+ALL_CANDIDATES = 0x1ff
+# Lookup tables from a candidate mask to its number of candidates, and to its list of candidate digits
+MASK_POPCOUNT = tuple(bin(m).count("1") for m in range(512))
+MASK_DIGITS = tuple(tuple(d for d in range(1, 10) if m & (1 << (d - 1))) for m in range(512))
+
+# Translates grid string characters to raw cell values (0-9)
+_FROM_DIGITS = bytes.maketrans(b"0123456789", bytes(range(10)))
 
 
 class Cell:
@@ -17,6 +53,10 @@ class Cell:
         self._value = value
         self.valid: bool = True
 
+        # The grid this cell belongs to (if any) and its index in the grid, so the grid can track value changes
+        self._grid: Optional["Grid"] = None
+        self._index: int = -1
+
         # Only lock the cell if the value is non-zero
         if value == 0:
             self._locked = False
@@ -30,6 +70,8 @@ class Cell:
     @value.setter
     def value(self, value):
         if not self._locked and value in range(10):
+            if self._grid is not None and value != self._value:
+                self._grid._cell_value_changed(self._index, self._value, value)
             self._value = value
 
     @property
@@ -72,8 +114,18 @@ class Grid:
             cells.append(row)
 
         self.cells = cells
+        # The same cells, indexed as in UNITS and PEERS
+        self._cells_flat: List[Cell] = [cell for row in cells for cell in row]
+        for i, cell in enumerate(self._cells_flat):
+            cell._grid = self
+            cell._index = i
         self._valid = True
 
+        # Incrementally maintained as cell values change: the number of cells holding each value in each unit, and a
+        # mask of the digits present in each unit
+        self._value_counts: List[List[int]] = [[9, 0, 0, 0, 0, 0, 0, 0, 0, 0] for _ in range(27)]
+        self._unit_masks: List[int] = [0] * 27
+
         if grid_string is not None:
             self.grid_string = grid_string
 
@@ -90,10 +142,47 @@ class Grid:
         if len(string) != 81:
             raise ValueError("length of values must be 81")
 
-        for i, cell in enumerate(self.flattened()):
-            cell.unlock()
-            cell.value = int(string[i])
-            cell.lock()
+        data = string.encode("ascii", "replace")
+        if not data.isdigit():
+            raise ValueError("grid string may only contain the digits 0-9")
+        self.values = data.translate(_FROM_DIGITS)
+
+    @property
+    def values(self) -> bytes:
+        """
+        :returns: the raw cell values (0-9) as 81 bytes, in the same order as grid_string
+        """
+        return bytes([cell._value for cell in self._cells_flat])
+
+    @values.setter
+    def values(self, values: bytes):
+        """
+        Sets every cell's value, locking the non-empty cells, in the same way as setting grid_string.
+
+        :param values: 81 raw cell values (0-9), e.g. bytes or a list of ints
+        """
+        if len(values) != 81:
+            raise ValueError("length of values must be 81")
+        if min(values) < 0 or max(values) > 9:
+            raise ValueError("cell values must be between 0 and 9 inclusive")
+
+        # Set the cells directly, then rebuild the tracked counts and masks in one pass rather than cell by cell
+        for cell, value in zip(self._cells_flat, values):
+            cell._value = value
+            cell._locked = value != 0
+
+        value_counts = self._value_counts
+        unit_masks = self._unit_masks
+        for u, unit in enumerate(UNITS):
+            counts = [0] * 10
+            mask = 0
+            for k in unit:
+                value = values[k]
+                counts[value] += 1
+                if value:
+                    mask |= 1 << (value - 1)
+            value_counts[u] = counts
+            unit_masks[u] = mask
 
         self.validate()
 
@@ -120,10 +209,8 @@ class Grid:
         """
         if i not in range(9):
             raise ValueError("i must be between 0 and 8 inclusive")
-        col = [row[i] for row in self.rows()]
-        assert len(col) == 9
-
-        return col
+        cells = self._cells_flat
+        return [cells[k] for k in UNITS[9 + i]]
 
     def box(self, i) -> [Cell]:
         """
@@ -137,14 +224,8 @@ class Grid:
         """
         if i not in range(9):
             raise ValueError("i must be between 0 and 8 inclusive")
-        row_start = 3 * (i // 3)
-        col_start = 3 * (i % 3)
-        box = []
-        for row_i in range(row_start, row_start + 3):
-            for col_i in range(col_start, col_start + 3):
-                box.append(self.cells[row_i][col_i])
-
-        return box
+        cells = self._cells_flat
+        return [cells[k] for k in UNITS[18 + i]]
 
     def rows(self) -> [[Cell]]:
         """
@@ -184,7 +265,7 @@ class Grid:
         return boxes
 
     def flattened(self):
-        return [cell for row in self.cells for cell in row]
+        return list(self._cells_flat)
 
     def empty_cell_coords(self) -> [(int, int)]:
         """
@@ -192,13 +273,7 @@ class Grid:
 
         :returns: a list of coordinate tuples (x, y) of the grid's empty cells
         """
-        coords = []
-        for i in range(9):
-            for j in range(9):
-                if self.cells[i][j].empty:
-                    coords.append((j, i))
-
-        return coords
+        return [(i % 9, i // 9) for i, cell in enumerate(self._cells_flat) if cell._value == 0]
 
     @property
     def valid(self) -> bool:
@@ -219,31 +294,23 @@ class Grid:
             * each row follows the same rule
             * each 3x3 box follows the same rule
         """
+        cells = self._cells_flat
+
         # Reset valid flag of all cells
-        for cell in self.flattened():
+        for cell in cells:
             cell.valid = True
 
-        # Get all cell groups, and remove the empty cells (we don't care about these)
-        cell_groups = self.rows() + self.cols() + self.boxes()
-        cell_groups = [
-            [c for c in cells if not c.empty] for cells in cell_groups
-        ]
+        # The tracked value counts show whether any value is repeated, without looking at the cells
+        if all(max(counts[1:]) <= 1 for counts in self._value_counts):
+            self._valid = True
+            return
 
+        # Flag the duplicate cells, ignoring the empty cells (we don't care about these)
         valid = True
-        for cell_group in cell_groups:
-            # Flag the duplicate cells in this cell group
-            # TODO: make this algorithm more efficient
-            seen_cells = set()
-            for cell in cell_group:
-                if cell in seen_cells:
-                    valid &= False
-                    cell.valid = False
-                    # Also set the 'seen' cell as invalid
-                    for c in seen_cells:
-                        if c == cell:
-                            c.valid = False
-                            break
-                seen_cells.add(cell)
+        for cell, conflict in zip(cells, kernels.find_conflicts(self.values)):
+            if conflict:
+                valid = False
+                cell.valid = False
 
         self._valid = valid
 
@@ -254,12 +321,53 @@ class Grid:
 
         :returns: True if the grid is solved, otherwise False
         """
-        for row in self.cells:
-            for cell in row:
-                if cell.empty:
-                    return False
+        for cell in self._cells_flat:
+            if cell._value == 0:
+                return False
         return self.valid
 
+    def _cell_value_changed(self, i: int, old_value: int, new_value: int):
+        value_counts = self._value_counts
+        unit_masks = self._unit_masks
+        for u in CELL_UNITS[i]:
+            counts = value_counts[u]
+            counts[old_value] -= 1
+            counts[new_value] += 1
+            if old_value != 0 and counts[old_value] == 0:
+                unit_masks[u] &= ~(1 << (old_value - 1))
+            if new_value != 0:
+                unit_masks[u] |= 1 << (new_value - 1)
+
+    def candidate_mask(self, x: int, y: int) -> int:
+        """
+        Returns the possible values for a specific cell as a bitmask, where bit (d - 1) is set if d is possible. This is
+        maintained incrementally as cell values change, so is cheap to call for every cell.
+
+        :param x: the cell's x coordinate, between 0 and 8 inclusive
+        :param y: the cell's y coordinate, between 0 and 8 inclusive
+
+        :returns: a 9-bit candidate mask for the cell at (x, y)
+        """
+        row, col, box = CELL_UNITS[9 * y + x]
+        unit_masks = self._unit_masks
+        return ALL_CANDIDATES & ~(unit_masks[row] | unit_masks[col] | unit_masks[box])
+
+    def candidate_masks(self) -> List[int]:
+        """
+        Returns the candidate mask (see candidate_mask) of every cell at once, which is quicker than asking for each
+        cell in turn.
+
+        With the compiled kernels, the masks are recomputed from the cell values rather than read from the incremental
+        unit masks: a single pass in C, including building the values, takes under half the time of the 81 lookups in
+        Python. Both give the same masks (see tests/test_kernels.py).
+
+        :returns: the 81 candidate masks, in the same order as grid_string
+        """
+        if kernels.NATIVE:
+            return kernels.candidate_masks(self.values)
+        unit_masks = self._unit_masks
+        return [ALL_CANDIDATES & ~(unit_masks[row] | unit_masks[col] | unit_masks[box]) for row, col, box in CELL_UNITS]
+
     def possible_values_for_cell(self, x: int, y: int) -> set:
         """
         Returns a set of the possible values for a specific cell.
@@ -269,20 +377,36 @@ class Grid:
 
         :returns: a set of possible values for the cell at (x, y)
         """
-        row_values = set([cell.value for cell in self.row(y)])
-        col_values = set([cell.value for cell in self.col(x)])
-        box_index = 3 * (y // 3) + x // 3
-        box_values = set([cell.value for cell in self.box(box_index)])
-
-        values = set(range(1, 10)) - row_values - col_values - box_values
-        return values
+        return set(MASK_DIGITS[self.candidate_mask(x, y)])
 
     @property
     def empty(self) -> bool:
-        result = True
-        for cell in self.flattened():
-            result &= cell.empty
-        return result
+        for cell in self._cells_flat:
+            if cell._value != 0:
+                return False
+        return True
+
+    def __deepcopy__(self, memo):
+        # Copying is on the hot path of step recording, so avoid the generic (and much slower) deepcopy machinery
+        grid = Grid.__new__(Grid)
+        memo[id(self)] = grid
+
+        cells_flat = []
+        for cell in self._cells_flat:
+            c = Cell.__new__(Cell)
+            c._value = cell._value
+            c._locked = cell._locked
+            c.valid = cell.valid
+            c._grid = grid
+            c._index = cell._index
+            cells_flat.append(c)
+
+        grid.cells = [cells_flat[i:i + 9] for i in range(0, 81, 9)]
+        grid._cells_flat = cells_flat
+        grid._valid = self._valid
+        grid._value_counts = [list(counts) for counts in self._value_counts]
+        grid._unit_masks = list(self._unit_masks)
+        return grid
 
     def __eq__(self, o):
         if isinstance(o, Grid):
@@ -290,21 +414,26 @@ class Grid:
         return False
 
     def __str__(self):
-        s = ""
+        lines = []
         for i, row in enumerate(self.cells):
             if i == 0:
-                s += "┌" + "─" * 9 + "┬" + "─" * 9 + "┬" + "─" * 9 + "┐\n"
+                lines.append("┌" + "─" * 9 + "┬" + "─" * 9 + "┬" + "─" * 9 + "┐")
             elif i % 3 == 0:
-                s += "├" + "─" * 9 + "┼" + "─" * 9 + "┼" + "─" * 9 + "┤\n"
+                lines.append("├" + "─" * 9 + "┼" + "─" * 9 + "┼" + "─" * 9 + "┤")
+            line = []
             for j, cell in enumerate(row):
                 if j % 3 == 0:
-                    s += "│"
-                s += f" {cell} "
-            s += "│\n"
-        s += "└" + "─" * 9 + "┴" + "─" * 9 + "┴" + "─" * 9 + "┘"
+                    line.append("│")
+                line.append(f" {cell} ")
+            line.append("│")
+            lines.append("".join(line))
+        lines.append("└" + "─" * 9 + "┴" + "─" * 9 + "┴" + "─" * 9 + "┘")
+
+        return "\n".join(lines)
 
-        return s
 
+# Imported last, since the kernels use the tables above
+from sudokustepper import kernels  # noqa: E402
 
 if __name__ == "__main__":
     g = Grid("123456789" * 9)
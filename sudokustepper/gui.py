@@ -4,12 +4,17 @@ import threading
 from copy import deepcopy
 from typing import List, Optional
 
-from PyQt5.QtCore import pyqtSignal, pyqtProperty, pyqtSlot, Qt, QSize, QTimer, QFile, QTextStream, QObject, QEvent
-from PyQt5.QtGui import QKeyEvent, QKeySequence, QMouseEvent, QPaintEvent, QShowEvent
+from PyQt5.QtCore import (pyqtSignal, pyqtProperty, pyqtSlot, Qt, QSize, QTimer, QElapsedTimer, QFile, QTextStream,
+                          QObject, QEvent)
+from PyQt5.QtGui import QCloseEvent, QKeyEvent, QKeySequence, QMouseEvent, QShowEvent
 from PyQt5.QtWidgets import *
 
 from sudokustepper import solvers
-from sudokustepper.grid import Cell, Grid
+from sudokustepper.grid import MASK_DIGITS, Cell, Grid
+from sudokustepper.instrumentation import SolverStats
+from sudokustepper.parse import parse_grid
+from sudokustepper.prefetch import PrefetchResult, Prefetcher
+from sudokustepper.trace import FILE_EXTENSION as TRACE_FILE_EXTENSION, TraceFormatError, TraceReader, write_trace
 
 
 class CellWidget(QLabel):
@@ -20,6 +25,8 @@ class CellWidget(QLabel):
         super().__init__()
 
         self._cell: Cell = Cell()
+        self._value: int = 0
+        self._candidates: int = 0
         self._locked: bool = False
         self._valid: bool = True
         self._selected: bool = False
@@ -38,21 +45,62 @@ class CellWidget(QLabel):
 
     @cell.setter
     def cell(self, cell) -> None:
+        self.set_cell(cell)
+
+    def set_cell(self, cell: Cell, candidates: int = 0) -> None:
+        """
+        :param cell: the cell to show
+        :param candidates: a candidate mask (see Grid.candidate_mask) to show as pencil marks if the cell is empty, or
+                           0 to show none
+        """
         self._cell = cell
-        self.update()
-
-    def paintEvent(self, e: QPaintEvent) -> None:
-        self._locked = self._cell.locked
-        self._valid = self._cell.valid
-
-        t = "" if self.cell.empty else str(self.cell.value)
-        self.setText(t)
-
-        # Qt trick to reload the QSS style for this widget
+        self.refresh(candidates)
+
+    def refresh(self, candidates: int = None) -> None:
+        """
+        Updates the widget from its cell, only touching the text and style if they have changed.
+
+        :param candidates: the new candidate mask, or None to keep the current one
+        """
+        value = self._cell.value
+        if candidates is None:
+            candidates = self._candidates
+        if value != 0:
+            candidates = 0
+
+        if value != self._value or candidates != self._candidates:
+            pencil_changed = (candidates != 0) != (self._candidates != 0)
+            self._value = value
+            self._candidates = candidates
+            if value != 0:
+                self.setText(str(value))
+            elif candidates != 0:
+                self.setText(self._pencil_marks_text(candidates))
+            else:
+                self.setText("")
+        else:
+            pencil_changed = False
+
+        locked = self._cell.locked
+        valid = self._cell.valid
+        if locked != self._locked or valid != self._valid or pencil_changed:
+            self._locked = locked
+            self._valid = valid
+            self._restyle()
+
+    @staticmethod
+    def _pencil_marks_text(candidates: int) -> str:
+        digits = MASK_DIGITS[candidates]
+        lines = []
+        for row_start in (1, 4, 7):
+            lines.append(" ".join(str(d) if d in digits else " " for d in range(row_start, row_start + 3)))
+        return "\n".join(lines)
+
+    def _restyle(self) -> None:
+        # Qt trick to reload the QSS style for this widget, needed whenever a property used by a selector changes
         self.style().unpolish(self)
         self.style().polish(self)
-
-        super().paintEvent(e)
+        self.update()
 
     @pyqtProperty(bool)
     def valid(self) -> bool:
@@ -66,17 +114,25 @@ class CellWidget(QLabel):
     def selected(self) -> bool:
         return self._selected
 
+    @pyqtProperty(bool)
+    def pencil(self) -> bool:
+        return self._candidates != 0
+
     def select(self) -> None:
         if self._editable:
             self._cell.unlock()
             self._selected = True
             self.on_selected.emit()
-            self.update()
+            self.refresh()
+            self._restyle()
 
     def deselect(self) -> None:
+        was_selected = self._selected
         self._selected = False
         self._cell.lock()
-        self.update()
+        self.refresh()
+        if was_selected:
+            self._restyle()
 
     def mousePressEvent(self, e: QMouseEvent):
         self.select()
@@ -90,6 +146,7 @@ class CellWidget(QLabel):
         self._editable = editable
         if not editable:
             self.deselect()
+        self._restyle()
 
 
 class GridWidget(QWidget):
@@ -102,6 +159,7 @@ class GridWidget(QWidget):
         self._grid = Grid()
         self._cell_widgets: List[List[CellWidget]] = []
         self._editable: bool = False
+        self._show_candidates: bool = False
         self.init_ui()
 
     def init_ui(self):
@@ -131,11 +189,31 @@ class GridWidget(QWidget):
 
     @grid.setter
     def grid(self, grid):
+        # Each cell widget only repaints if its cell differs from the one it is currently showing
         self._grid = grid
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Updates the cell widgets after the grid has been modified in place.
+        """
+        grid = self._grid
+        # The grid tracks candidates incrementally, so this is cheap enough to do on every step
+        masks = grid.candidate_masks() if self._show_candidates else None
         for i in range(9):
             for j in range(9):
-                self._cell_widgets[i][j].cell = self._grid.cells[i][j]
-        self.update()
+                cell = grid.cells[i][j]
+                candidates = masks[9 * i + j] if masks is not None and cell.empty else 0
+                self._cell_widgets[i][j].set_cell(cell, candidates)
+
+    @property
+    def show_candidates(self) -> bool:
+        return self._show_candidates
+
+    @show_candidates.setter
+    def show_candidates(self, show_candidates: bool) -> None:
+        self._show_candidates = show_candidates
+        self.refresh()
 
     @pyqtProperty(bool)
     def editable(self) -> bool:
@@ -150,7 +228,6 @@ class GridWidget(QWidget):
         for row in self._cell_widgets:
             for cell_widget in row:
                 cell_widget.editable = editable
-        self.update()
 
     @pyqtSlot()
     def cell_selected(self) -> None:
@@ -243,15 +320,24 @@ class GridWidget(QWidget):
 class PlaybackControlsWidget(QWidget):
     step_selected = pyqtSignal(int)
 
+    # Playback never renders more often than this (roughly the display refresh rate); at higher speeds, the
+    # intermediate steps are skipped
+    FRAME_INTERVAL_MS = 16
+    MAX_STEPS_PER_SECOND = 1000000
+
     def __init__(self):
         super().__init__()
 
         self._playback_timer = QTimer(self)
-        self._playback_timer.timeout.connect(self._step)
+        self._playback_timer.setTimerType(Qt.PreciseTimer)
+        self._playback_timer.timeout.connect(self._playback_tick)
+        self._playback_clock = QElapsedTimer()
+        self._pending_steps: float = 0.0
 
         self._slider_steps = None
         self._lbl_end_step = None
         self._btn_play_pause = None
+        self._spin_box_speed = None
         self.init_ui()
 
     def init_ui(self):
@@ -298,11 +384,19 @@ class PlaybackControlsWidget(QWidget):
         btn_fast_forward = QPushButton(">>>")
         btn_fast_forward.clicked.connect(self.fastforward)
 
+        self._spin_box_speed = QSpinBox()
+        self._spin_box_speed.setRange(1, self.MAX_STEPS_PER_SECOND)
+        self._spin_box_speed.setValue(10)
+        self._spin_box_speed.setSuffix(" steps/s")
+        self._spin_box_speed.setAccelerated(True)
+        self._spin_box_speed.valueChanged.connect(self._speed_changed)
+
         controls_layout.addWidget(btn_rewind)
         controls_layout.addWidget(btn_step_back)
         controls_layout.addWidget(self._btn_play_pause)
         controls_layout.addWidget(btn_step_next)
         controls_layout.addWidget(btn_fast_forward)
+        controls_layout.addWidget(self._spin_box_speed)
 
     def reset(self, num_steps: int):
         self._slider_steps.setMaximum(num_steps)
@@ -321,12 +415,30 @@ class PlaybackControlsWidget(QWidget):
     def play_head_at_end(self) -> bool:
         return self._slider_steps.sliderPosition() == self._slider_steps.maximum()
 
+    @property
+    def steps_per_second(self) -> int:
+        return self._spin_box_speed.value()
+
+    @steps_per_second.setter
+    def steps_per_second(self, steps_per_second: int) -> None:
+        self._spin_box_speed.setValue(steps_per_second)
+
+    def _timer_interval(self) -> int:
+        return max(self.FRAME_INTERVAL_MS, 1000 // self.steps_per_second)
+
+    @pyqtSlot(int)
+    def _speed_changed(self, steps_per_second: int):
+        if self._playback_timer.isActive():
+            self._playback_timer.setInterval(self._timer_interval())
+
     @pyqtSlot()
     def play(self):
         if self.play_head_at_end:
             self.rewind()
 
-        self._playback_timer.start(100)
+        self._pending_steps = 0.0
+        self._playback_clock.start()
+        self._playback_timer.start(self._timer_interval())
         self._btn_play_pause.setText("Pause")
 
     @pyqtSlot()
@@ -347,10 +459,19 @@ class PlaybackControlsWidget(QWidget):
     @pyqtSlot()
     def step(self):
         self.pause()
-        self._step()
-
-    def _step(self):
-        new_pos = self._slider_steps.sliderPosition() + 1
+        self._advance(1)
+
+    def _playback_tick(self):
+        # Advance by however many steps are due since the last tick, so only the latest step is rendered
+        self._pending_steps += self._playback_clock.restart() * self.steps_per_second / 1000
+        num_steps = int(self._pending_steps)
+        if num_steps > 0:
+            self._pending_steps -= num_steps
+            self._advance(num_steps)
+
+    def _advance(self, num_steps: int):
+        # Seeking is a direct jump; the steps in between are never visited
+        new_pos = min(self._slider_steps.sliderPosition() + num_steps, self._slider_steps.maximum())
         self._slider_steps.setSliderPosition(new_pos)
 
         if self.play_head_at_end:
@@ -364,9 +485,15 @@ class PlaybackControlsWidget(QWidget):
 
 
 class EditGridDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, prefetcher: Optional[Prefetcher] = None, solver_name: Optional[str] = None):
+        """
+        :param prefetcher: if given, each valid grid is solved in the background while the user edits
+        :param solver_name: the solver to use for background solves, a key of solvers.ALL_SOLVERS
+        """
         super().__init__(parent)
 
+        self._prefetcher = prefetcher
+        self._solver_name = solver_name
         self.grid: Grid = Grid()
         self._grid_preview = GridWidget()
         self._grid_preview.grid = self.grid
@@ -382,7 +509,7 @@ class EditGridDialog(QDialog):
         main_layout = QGridLayout()
         self.setLayout(main_layout)
 
-        main_layout.addWidget(QLabel("Edit below, or paste an 81-char grid string (0070090301...)"), 0, 0)
+        main_layout.addWidget(QLabel("Edit below, or paste a grid (0070090301..., or 9 lines of 9 cells)"), 0, 0)
         main_layout.addWidget(self._grid_preview, 1, 0)
 
         self._button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -404,28 +531,43 @@ class EditGridDialog(QDialog):
         self.update_ui()
 
     def update_ui(self):
-        self._grid_preview.update()
-        self._button_box.button(QDialogButtonBox.Ok).setEnabled(self.valid)
+        # Validate before refreshing, so that the cells' valid flags are up to date
+        valid = self.valid
+        self._grid_preview.refresh()
+        self._button_box.button(QDialogButtonBox.Ok).setEnabled(valid)
+
+        if self._prefetcher is not None:
+            if valid and not self.grid.empty:
+                self._prefetcher.prefetch(self.grid.grid_string, self._solver_name)
+            else:
+                self._prefetcher.cancel()
 
     def mousePressEvent(self, e: QMouseEvent):
         self._grid_preview.deselect_current_cell()
         super().mousePressEvent(e)
 
     def showEvent(self, e: QShowEvent) -> None:
-        # If the grid is empty, attempt to create a grid from the clipboard upon showing the dialog
+        # If the grid is empty, attempt to create a grid from the clipboard upon showing the dialog, quietly ignoring
+        # clipboard contents which aren't a grid
         if self.grid.empty:
-            self.load_grid_from_clipboard()
+            self.load_grid_from_clipboard(notify=False)
+        self.update_ui()
 
-    def load_grid_from_clipboard(self):
-        clipboard = QApplication.clipboard()
-        if clipboard.mimeData().hasText():
-            try:
-                grid_str = clipboard.text()
-                self.grid.grid_string = grid_str
-                self.update_ui()
-            except ValueError:
-                # TODO: notify the user of the error
-                return
+    def load_grid_from_clipboard(self, notify: bool = True):
+        """
+        :param notify: set to False to ignore clipboard contents which aren't a grid, rather than warning the user
+        """
+        mime_data = QApplication.clipboard().mimeData()
+        if mime_data is None or not mime_data.hasText():
+            return
+
+        try:
+            self.grid.values = parse_grid(mime_data.text())
+        except ValueError as e:
+            if notify:
+                QMessageBox.warning(self, "Paste Grid", "The clipboard doesn't contain a grid: {}".format(e))
+            return
+        self.update_ui()
 
     def eventFilter(self, o: QObject, e: QEvent) -> bool:
         if e.type() == e.KeyPress:
@@ -444,17 +586,33 @@ class EditGridDialog(QDialog):
 
 
 class SudokuSolverWindow(QMainWindow, solvers.SolverDelegate):
+    # The approximate memory, in bytes, the solver may use for its step history before storing steps compactly, then
+    # before it stops recording steps
+    SOLVER_MEMORY_LIMIT = 512 * 1024 * 1024
+
+    # Emitted from a worker thread when a background solve the user is waiting for has finished
+    prefetch_finished = pyqtSignal(str, str)
+
     def __init__(self):
         super().__init__()
 
         self.original_grid = Grid()
         self.solver: solvers.Solver = None
         self._solver_thread: threading.Thread = None
+        # The steps being played back, either from the solver or from a trace file
+        self.step_history = []
+        self._step_descriptions: Optional[List[str]] = None
+        self._trace: Optional[TraceReader] = None
+        # Solves the grid being edited in the background, so that "Solve!" can often show the result straight away
+        self._prefetcher = Prefetcher(memory_limit=self.SOLVER_MEMORY_LIMIT)
+        self.prefetch_finished.connect(self.show_prefetched_result)
 
         self._grid_widget = None
         self._btn_load_grid = None
         self._combo_box_algorithm = None
         self._btn_start_solver = None
+        self._btn_open_trace = None
+        self._btn_export_trace = None
         self._playback_controls = None
         self.init_ui()
 
@@ -489,9 +647,11 @@ class SudokuSolverWindow(QMainWindow, solvers.SolverDelegate):
 
         self._combo_box_algorithm = QComboBox()
         self._combo_box_algorithm.setEnabled(False)
-        # Add all solver names to the list
-        self._combo_box_algorithm.addItems([k.capitalize() for k in solvers.ALL_SOLVERS.keys()])
+        # Add the names of the solvers which can be played back to the list
+        for name in solvers.ALL_SOLVERS.names(traceable=True, grid_size=9):
+            self._combo_box_algorithm.addItem(name.capitalize(), name)
         self._combo_box_algorithm.setCurrentIndex(0)
+        self._combo_box_algorithm.currentIndexChanged.connect(self.prefetch)
         options_layout.addRow("Algorithm", self._combo_box_algorithm)
 
         self._btn_start_solver = QPushButton("Solve!")
@@ -499,62 +659,228 @@ class SudokuSolverWindow(QMainWindow, solvers.SolverDelegate):
         self._btn_start_solver.clicked.connect(self.start_solver)
         options_layout.addRow(self._btn_start_solver)
 
+        check_box_candidates = QCheckBox("Show candidates")
+        check_box_candidates.toggled.connect(self.show_candidates)
+        options_layout.addRow(check_box_candidates)
+
+        divider_bottom = QFrame()
+        divider_bottom.setFrameStyle(QFrame.HLine)
+        divider_bottom.setFrameShadow(QFrame.Sunken)
+        options_layout.addRow(divider_bottom)
+
+        self._btn_open_trace = QPushButton("Open Trace...")
+        self._btn_open_trace.clicked.connect(self.open_trace_dialog)
+        options_layout.addRow(self._btn_open_trace)
+
+        self._btn_export_trace = QPushButton("Export Trace...")
+        self._btn_export_trace.setEnabled(False)
+        self._btn_export_trace.clicked.connect(self.export_trace_dialog)
+        options_layout.addRow(self._btn_export_trace)
+
         self._playback_controls = PlaybackControlsWidget()
         self._playback_controls.setEnabled(False)
         self._playback_controls.step_selected.connect(self.preview_solver_step)
         main_layout.addWidget(self._playback_controls)
 
-    def load_grid(self, grid: Grid):
+    def load_grid(self, grid: Grid, prefetch: bool = True):
+        """
+        :param prefetch: set to False to not start solving the grid in the background, e.g. when its steps are already
+                         known
+        """
         self.original_grid = deepcopy(grid)
         self._grid_widget.grid = self.original_grid
-        self._grid_widget.update()
 
         self._combo_box_algorithm.setEnabled(True)
         self._btn_start_solver.setEnabled(True)
         self.statusBar().showMessage("Grid loaded")
+        if prefetch:
+            self.prefetch()
+
+    def _selected_solver_name(self) -> str:
+        return self._combo_box_algorithm.currentData()
+
+    @pyqtSlot()
+    def prefetch(self):
+        if not self.original_grid.empty:
+            self._prefetcher.prefetch(self.original_grid.grid_string, self._selected_solver_name())
+
+    def _set_controls_enabled(self, enabled: bool):
+        self._btn_load_grid.setEnabled(enabled)
+        self._combo_box_algorithm.setEnabled(enabled)
+        self._btn_start_solver.setEnabled(enabled)
+        self._btn_open_trace.setEnabled(enabled)
+
+    def _show_solved(self, stats: SolverStats, grid: Grid, num_steps: int):
+        message = "Solved in {:.3f} seconds ({:.3f} s CPU), {} steps, {} backtracks, {:.1f} MB peak memory".format(
+            stats.wall_time, stats.cpu_time, stats.steps, stats.backtracks, stats.peak_memory / 1e6)
+        if stats.memory_limit_action == "stop":
+            message += " (memory limit reached, only the first {} steps were recorded)".format(num_steps)
+        self.statusBar().showMessage(message)
+        self._grid_widget.grid = grid
+        self._set_controls_enabled(True)
+
+    def _show_failed(self, stats: SolverStats):
+        self.statusBar().showMessage("No solution found after {:.3f} seconds, {} steps".format(
+            stats.wall_time, stats.steps))
+        self._set_controls_enabled(True)
 
     def on_solver_solved(self):
-        self.statusBar().showMessage("Solved in {} seconds".format("..."))
-        self._grid_widget.grid = self.solver.grid
-        self._btn_load_grid.setEnabled(True)
-        self._combo_box_algorithm.setEnabled(True)
-        self._btn_start_solver.setEnabled(True)
-        self._playback_controls.reset(self.solver.num_steps)
+        self._show_solved(self.solver.stats, self.solver.grid, len(self.solver.step_history))
+        self.set_step_history(self.solver.step_history)
+
+    def set_step_history(self, step_history, step_descriptions: Optional[List[str]] = None) -> None:
+        """
+        Replaces the steps being played back.
+
+        :param step_history: a sequence of grids, e.g. a solver's step history or a TraceReader
+        :param step_descriptions: the description of each step, if known and not available from the solver
+        """
+        if self._trace is not None and self._trace is not step_history:
+            self._trace.close()
+            self._trace = None
+
+        self.step_history = step_history
+        self._step_descriptions = step_descriptions
+        self._btn_export_trace.setEnabled(len(step_history) > 0)
+        self._playback_controls.reset(len(step_history))
         self._playback_controls.setEnabled(True)
 
     def on_solver_failed(self):
-        self._btn_load_grid.setEnabled(True)
-        self._combo_box_algorithm.setEnabled(True)
-        self._btn_start_solver.setEnabled(True)
+        self._show_failed(self.solver.stats)
 
     @pyqtSlot()
     def load_grid_dialog(self):
-        dialog = EditGridDialog(self)
+        dialog = EditGridDialog(self, self._prefetcher, self._selected_solver_name())
         dialog.grid.grid_string = self.original_grid.grid_string
         if dialog.exec():
             self.load_grid(dialog.grid)
+        else:
+            # Go back to solving the loaded grid in the background
+            self.prefetch()
 
     @pyqtSlot()
     def start_solver(self):
-        self._btn_load_grid.setEnabled(False)
-        self._combo_box_algorithm.setEnabled(False)
-        self._btn_start_solver.setEnabled(False)
+        self._set_controls_enabled(False)
+
+        solver_name = self._selected_solver_name()
+        grid_string = self.original_grid.grid_string
+        if self._prefetcher.result(grid_string, solver_name) is not None:
+            self.show_prefetched_result(grid_string, solver_name)
+            return
+
+        future = self._prefetcher.pending(grid_string, solver_name)
+        if future is not None:
+            # Wait for the background solve rather than starting again
+            self.statusBar().showMessage("Solving...")
+            future.add_done_callback(lambda f: self.prefetch_finished.emit(grid_string, solver_name))
+            return
 
-        solver_cls = solvers.ALL_SOLVERS[self._combo_box_algorithm.currentText().lower()]
-        assert solver_cls is not None
-        self.solver = solver_cls(deepcopy(self.original_grid), delegate=self)
+        self._start_solver_thread(solver_name)
+
+    def _start_solver_thread(self, solver_name: str):
+        # Leave the CPU to this solve
+        self._prefetcher.cancel()
+
+        self.solver = solvers.ALL_SOLVERS.info(solver_name).create(deepcopy(self.original_grid), delegate=self,
+                                                                  memory_limit=self.SOLVER_MEMORY_LIMIT)
 
         self._solver_thread = threading.Thread(target=self.solver.solve)
         self._solver_thread.start()
 
+    @pyqtSlot(str, str)
+    def show_prefetched_result(self, grid_string: str, solver_name: str):
+        result: PrefetchResult = self._prefetcher.result(grid_string, solver_name)
+        if result is None:
+            # The background solve was cancelled or failed, so solve as usual
+            self._start_solver_thread(solver_name)
+            return
+
+        self.solver = None
+        if result.solution is None:
+            self._show_failed(result.stats)
+            return
+
+        try:
+            trace = TraceReader(result.trace_path)
+        except (OSError, TraceFormatError):
+            self._start_solver_thread(solver_name)
+            return
+
+        # Keep the original puzzle's locked cells, as the solver would
+        grid = deepcopy(self.original_grid)
+        for cell, value in zip(grid.flattened(), result.solution):
+            cell.value = int(value)
+        self._show_solved(result.stats, grid, len(trace))
+        self.set_step_history(trace, result.step_descriptions)
+        self._trace = trace
+
+    @pyqtSlot(bool)
+    def show_candidates(self, show: bool):
+        self._grid_widget.show_candidates = show
+
+    @pyqtSlot()
+    def open_trace_dialog(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Trace", "",
+                                              "Solver traces (*{})".format(TRACE_FILE_EXTENSION))
+        if path:
+            self.open_trace(path)
+
+    def open_trace(self, path: str):
+        try:
+            trace = TraceReader(path)
+        except (OSError, TraceFormatError) as e:
+            QMessageBox.warning(self, "Open Trace", "Unable to open the trace file: {}".format(e))
+            return
+
+        # The trace holds the steps already, so don't solve the puzzle again
+        self._prefetcher.cancel()
+        self.load_grid(trace.original, prefetch=False)
+        # Replacing the step history closes the previous trace, so only then keep this one
+        self.set_step_history(trace)
+        self._trace = trace
+        self.statusBar().showMessage("Opened trace with {} steps".format(len(trace)))
+
+    @pyqtSlot()
+    def export_trace_dialog(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Trace", "",
+                                              "Solver traces (*{})".format(TRACE_FILE_EXTENSION))
+        if not path:
+            return
+        if not path.endswith(TRACE_FILE_EXTENSION):
+            path += TRACE_FILE_EXTENSION
+
+        try:
+            num_steps = write_trace(path, self.original_grid, self.step_history)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Trace", "Unable to export the trace: {}".format(e))
+            return
+        self.statusBar().showMessage("Exported {} steps to {}".format(num_steps, path))
+
     @pyqtSlot(int)
     def preview_solver_step(self, step: int):
         if step == 0:
             self._grid_widget.grid = self.original_grid
             self.statusBar().showMessage("Original puzzle")
         else:
-            self._grid_widget.grid = self.solver.step_history[step - 1]
-            self.statusBar().showMessage("Showing step {}".format(step))
+            try:
+                self._grid_widget.grid = self.step_history[step - 1]
+            except TraceFormatError as e:
+                # Shown in the status bar rather than a dialog, which would pop up again at every step of playback
+                self.statusBar().showMessage("Unable to read step {} of the trace: {}".format(step, e))
+                return
+            description = None
+            if self._step_descriptions is not None:
+                description = self._step_descriptions[step - 1] if step <= len(self._step_descriptions) else None
+            elif self.solver is not None and self.step_history is self.solver.step_history:
+                description = self.solver.step_description(step)
+            if description:
+                self.statusBar().showMessage("Showing step {}: {}".format(step, description))
+            else:
+                self.statusBar().showMessage("Showing step {}".format(step))
+
+    def closeEvent(self, e: QCloseEvent) -> None:
+        self._prefetcher.close()
+        super().closeEvent(e)
 
 
 def main():
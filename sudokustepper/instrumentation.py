@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Supported values for the profile option of a Solver
+PROFILERS = ("cprofile", "sampling")
+
+
+class PhaseTime:
+    def __init__(self):
+        self.wall: float = 0.0
+        self.cpu: float = 0.0
+
+    def __repr__(self):
+        return "<PhaseTime wall:%.6f cpu:%.6f>" % (self.wall, self.cpu)
+
+
+class SolverStats:
+    """
+    Counters and timings collected while a solver runs.
+    """
+
+    def __init__(self):
+        self.steps: int = 0
+        self.backtracks: int = 0
+        # The number of times a randomised search started again from the puzzle
+        self.restarts: int = 0
+        # The number of times a backjumping search jumped back past more than one cell
+        self.backjumps: int = 0
+        self.candidate_lookups: int = 0
+        self.validations: int = 0
+        self.wall_time: float = 0.0
+        self.cpu_time: float = 0.0
+        self.phases: Dict[str, PhaseTime] = {}
+        self.profile_report: Optional[str] = None
+
+        # Approximate memory use of the solver, in bytes: its step history at the end of the solve, and the peak of the
+        # step history and internal structures combined
+        self.history_bytes: int = 0
+        self.peak_memory: int = 0
+        # The peak resident set size of the whole process so far, in bytes, if the platform reports it
+        self.peak_rss: Optional[int] = None
+        # What the solver did on exceeding its memory limit ("compact" or "stop"), if it did
+        self.memory_limit_action: Optional[str] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Context manager accumulating the wall and CPU time spent in a named phase of the solve. Phases may be entered
+        more than once, but should not be nested within a phase of the same name.
+
+        :param name: the name of the phase, e.g. "setup" or "search"
+        """
+        phase_time = self.phases.setdefault(name, PhaseTime())
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield phase_time
+        finally:
+            phase_time.wall += time.perf_counter() - wall_start
+            phase_time.cpu += time.thread_time() - cpu_start
+
+    def as_dict(self) -> dict:
+        """
+        :returns: the stats as a flat dictionary of plain values, suitable for serialisation
+        """
+        d = {
+            "steps": self.steps,
+            "backtracks": self.backtracks,
+            "restarts": self.restarts,
+            "backjumps": self.backjumps,
+            "candidate_lookups": self.candidate_lookups,
+            "validations": self.validations,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "history_bytes": self.history_bytes,
+            "peak_memory": self.peak_memory,
+            "peak_rss": self.peak_rss,
+            "memory_limit_action": self.memory_limit_action,
+        }
+        for name, phase_time in self.phases.items():
+            d["%s_wall_time" % name] = phase_time.wall
+            d["%s_cpu_time" % name] = phase_time.cpu
+        return d
+
+    def __str__(self):
+        return ("{:.3f} s ({:.3f} s CPU), {} steps, {} backtracks, {} candidate lookups, {} validations, "
+                "{:.1f} MB peak memory").format(
+            self.wall_time, self.cpu_time, self.steps, self.backtracks, self.candidate_lookups, self.validations,
+            self.peak_memory / 1e6)
+
+
+def approx_size(obj) -> int:
+    """
+    Estimates the memory used by an object and everything it references through containers and instance attributes,
+    counting shared objects once. Classes, functions and modules are not counted.
+
+    :returns: the approximate size in bytes
+    """
+    seen = set()
+    size = 0
+    pending = [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, (type, types.FunctionType, types.MethodType, types.ModuleType)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        if hasattr(obj, "__dict__"):
+            pending.append(obj.__dict__)
+    return size
+
+
+def peak_rss() -> Optional[int]:
+    """
+    :returns: the peak resident set size of the process so far in bytes, or None if the platform doesn't report it
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class SamplingProfiler:
+    """
+    A low-overhead statistical profiler, which periodically samples the call stack of a single thread from a background
+    thread.
+    """
+
+    def __init__(self, interval: float = 0.001, thread_id: int = None):
+        """
+        :param interval: the time between samples, in seconds
+        :param thread_id: the ident of the thread to sample, defaults to the thread calling start()
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.num_samples: int = 0
+        self._own_samples = Counter()
+        self._total_samples = Counter()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            self.num_samples += 1
+            self._own_samples[self._describe(frame)] += 1
+            # Count each function once per sample, even when it is recursive
+            seen = set()
+            while frame is not None:
+                seen.add(self._describe(frame))
+                frame = frame.f_back
+            self._total_samples.update(seen)
+
+    @staticmethod
+    def _describe(frame) -> str:
+        code = frame.f_code
+        return "%s:%d(%s)" % (code.co_filename, code.co_firstlineno, code.co_name)
+
+    def report(self, limit: int = 25) -> str:
+        """
+        :param limit: the maximum number of functions to list
+        :returns: a text report of the functions seen most often in the sampled call stacks
+        """
+        lines = ["%d samples" % self.num_samples, "%8s %8s  function" % ("own", "total")]
+        for name, total in self._total_samples.most_common(limit):
+            lines.append("%8d %8d  %s" % (self._own_samples[name], total, name))
+        return "\n".join(lines)
+
+
+@contextmanager
+def profiled(stats: SolverStats, profiler: Optional[str]):
+    """
+    Context manager profiling the enclosed code, storing the report in stats.profile_report.
+
+    :param stats: the stats to store the report in
+    :param profiler: one of PROFILERS, or None to disable profiling
+    """
+    if profiler is None:
+        yield
+        return
+
+    if profiler == "cprofile":
+        # Imported here, since pstats is slow to import and profiling is rarely used
+        import cProfile
+        import io
+        import pstats
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(25)
+            stats.profile_report = out.getvalue()
+    elif profiler == "sampling":
+        sampler = SamplingProfiler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            stats.profile_report = sampler.report()
+    else:
+        raise ValueError("profiler must be one of {}".format(", ".join(PROFILERS)))
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+"""
+Hot inner loops shared by the grid and solvers, operating on raw grid values: 81 bytes holding the cell values 0-9,
+ordered left-to-right then top-to-bottom.
+
+The functions here are the pure-Python reference implementations. If the optional compiled module
+sudokustepper._speedups has been built, its implementations of the same functions replace them automatically, and
+NATIVE is True. tests/test_kernels.py checks that both give identical results.
+"""
+
+from typing import List, Optional, Tuple
+
+from sudokustepper.grid import ALL_CANDIDATES, CELL_UNITS, PEERS, UNITS
+
+# True if the compiled implementations are in use
+NATIVE = False
+
+# How often (in nodes) search checks its cancel buffer
+CANCEL_CHECK_INTERVAL = 1024
+
+
+def py_find_conflicts(values: bytes) -> bytes:
+    """
+    Finds the cells whose value is repeated in their row, column or box. Empty cells never conflict.
+
+    :param values: the raw grid values
+
+    :returns: 81 bytes, 1 for each conflicting cell and 0 otherwise
+    """
+    conflicts = bytearray(81)
+    for unit in UNITS:
+        seen = {}
+        for k in unit:
+            value = values[k]
+            if value == 0:
+                continue
+            other = seen.get(value)
+            if other is None:
+                seen[value] = k
+            else:
+                conflicts[k] = 1
+                conflicts[other] = 1
+    return bytes(conflicts)
+
+
+def py_candidate_masks(values: bytes) -> List[int]:
+    """
+    :param values: the raw grid values
+
+    :returns: for each cell, the mask of values not used by the cell or its peers (see Grid.candidate_mask)
+    """
+    unit_masks = [0] * 27
+    for u, unit in enumerate(UNITS):
+        mask = 0
+        for k in unit:
+            if values[k]:
+                mask |= 1 << (values[k] - 1)
+        unit_masks[u] = mask
+
+    masks = []
+    for i in range(81):
+        row, col, box = CELL_UNITS[i]
+        masks.append(ALL_CANDIDATES & ~(unit_masks[row] | unit_masks[col] | unit_masks[box]))
+    return masks
+
+
+def py_search(values: bytes, limit: int = 1, cancel=None) -> Optional[Tuple[Optional[bytes], int, int, int]]:
+    """
+    Backtracking search, trying the first empty cell and its candidates in ascending order, the same order as
+    BacktracingSolver. The grid should be valid.
+
+    :param values: the raw grid values
+    :param limit: stop once this many solutions have been found, or 0 to find every solution
+    :param cancel: an optional buffer (e.g. a bytearray, or shared memory written by another process), whose first byte
+                   is checked every CANCEL_CHECK_INTERVAL nodes; the search stops once it is non-zero
+
+    :returns: a tuple (first solution as raw values or None, number of solutions, nodes, backtracks), or None if the
+              search was cancelled
+    """
+    grid = bytearray(values)
+    state = [None, 0, 0, 0, False]  # first solution, solutions, nodes, backtracks, cancelled
+
+    def _search(start: int) -> bool:
+        i = start
+        while i < 81 and grid[i]:
+            i += 1
+        if i == 81:
+            if state[0] is None:
+                state[0] = bytes(grid)
+            state[1] += 1
+            return limit != 0 and state[1] >= limit
+
+        used = 0
+        for k in PEERS[i]:
+            if grid[k]:
+                used |= 1 << grid[k]
+        for value in range(1, 10):
+            if used & (1 << value):
+                continue
+            state[2] += 1
+            if cancel is not None and state[2] % CANCEL_CHECK_INTERVAL == 0 and cancel[0]:
+                state[4] = True
+                return True
+            grid[i] = value
+            if _search(i + 1):
+                return True
+
+        grid[i] = 0
+        state[3] += 1
+        return False
+
+    _search(0)
+    if state[4]:
+        return None
+    return state[0], state[1], state[2], state[3]
+
+
+find_conflicts = py_find_conflicts
+candidate_masks = py_candidate_masks
+search = py_search
+
+try:
+    from sudokustepper._speedups import candidate_masks, find_conflicts, search
+    NATIVE = True
+except ImportError:
+    pass
+
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+"""
+Parallel solving of a single puzzle, by splitting its search tree into independent subproblems which are distributed
+across a pool of worker processes.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Optional, Tuple
+
+from sudokustepper import kernels, workers
+from sudokustepper.grid import Grid
+from sudokustepper.solvers import Solver
+
+
+def _solve_subproblem(grid_string: str, limit: Optional[int]) -> Tuple[Optional[str], int, int, int]:
+    """
+    Worker entry point, searching with the same cell and value order as BacktracingSolver. The pool's shared value (see
+    workers.shared) is a byte which is set to 1 to cancel every worker.
+
+    :returns: a tuple (first solution as a grid string or None, number of solutions, nodes, backtracks)
+    """
+    # A view of the byte, which the search can read while it runs
+    cancel_flag = memoryview(workers.shared).cast("B") if workers.shared is not None else None
+    values = bytes(int(c) for c in grid_string)
+    result = kernels.search(values, limit or 0, cancel_flag)
+    if result is None:
+        return None, 0, 0, 0
+    solution, num_solutions, nodes, backtracks = result
+    if solution is not None:
+        solution = "".join(str(v) for v in solution)
+    return solution, num_solutions, nodes, backtracks
+
+
+def split(grid: Grid, min_subproblems: int, max_depth: int = 8) -> Tuple[List[str], List[str]]:
+    """
+    Expands the first levels of the search tree breadth-first, using the same cell and value order as
+    BacktracingSolver, until there are at least min_subproblems open branches or max_depth levels have been expanded.
+
+    :param grid: the grid to split, which is not modified
+    :param min_subproblems: the number of subproblems to aim for
+    :param max_depth: the maximum number of levels to expand
+
+    :returns: a tuple (subproblems, solutions) of grid strings, where solutions are complete grids found while
+              expanding
+    """
+    frontier = [grid.grid_string]
+    solutions = []
+    depth = 0
+    while frontier and len(frontier) < min_subproblems and depth < max_depth:
+        next_frontier = []
+        for grid_string in frontier:
+            g = Grid(grid_string)
+            empty_cell_coords = g.empty_cell_coords()
+            if not empty_cell_coords:
+                solutions.append(grid_string)
+                continue
+
+            x, y = empty_cell_coords[0]
+            cell = g.cells[y][x]
+            for possible_value in g.possible_values_for_cell(x, y):
+                cell.value = possible_value
+                next_frontier.append(g.grid_string)
+        frontier = next_frontier
+        depth += 1
+
+    return frontier, solutions
+
+
+class ParallelBacktracingSolver(Solver):
+    """
+    Backtracking solver which splits the search tree into subproblems and searches them in a process pool.
+
+    By default the first solution found wins, and all other workers are cancelled. With count_solutions set, every
+    subproblem is searched to completion (or until limit solutions are found) and the total is stored in
+    num_solutions. Steps are not recorded, since the search happens in other processes.
+    """
+
+    traceable = False
+    supports_budgets = False
+    parallel = True
+
+    def __init__(self, grid: Grid, delegate=None, profile: Optional[str] = None, processes: int = None,
+                 count_solutions: bool = False, limit: int = None, subproblems_per_process: int = 8):
+        """
+        :param processes: the number of worker processes, defaults to the number of CPUs
+        :param count_solutions: set to True to count every solution instead of stopping at the first one
+        :param limit: when counting, stop once this many solutions have been found
+        :param subproblems_per_process: how many subproblems to aim for per worker, for load balancing
+        """
+        super().__init__(grid, delegate, profile)
+        self.processes: int = processes or os.cpu_count() or 1
+        self.count_solutions: bool = count_solutions
+        self.limit: Optional[int] = limit if count_solutions else 1
+        self.subproblems_per_process: int = subproblems_per_process
+        self.num_solutions: int = 0
+
+    def _solve(self):
+        if not self._grid_valid():
+            return False
+
+        with self._phase("split"):
+            subproblems, solutions = split(self.grid, self.processes * self.subproblems_per_process)
+
+        first_solution = solutions[0] if solutions else None
+        self.num_solutions = len(solutions)
+
+        with self._phase("search"):
+            if subproblems and not self._limit_reached():
+                first_solution = self._search(subproblems, first_solution)
+
+        if first_solution is None:
+            return False
+
+        for cell, value in zip(self.grid.flattened(), first_solution):
+            cell.value = int(value)
+        return self._grid_solved()
+
+    def _limit_reached(self) -> bool:
+        return self.limit is not None and self.num_solutions >= self.limit
+
+    def _search(self, subproblems: List[str], first_solution: Optional[str]) -> Optional[str]:
+        cancel_flag = multiprocessing.RawValue("B", 0)
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=workers.init_worker,
+                                 initargs=(cancel_flag,)) as executor:
+            pending = {executor.submit(_solve_subproblem, subproblem, self.limit) for subproblem in subproblems}
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        solution, num_solutions, nodes, backtracks = future.result()
+                        self.stats.steps += nodes
+                        self.stats.backtracks += backtracks
+                        self.num_solutions += num_solutions
+                        if first_solution is None:
+                            first_solution = solution
+
+                    if self._limit_reached():
+                        break
+            finally:
+                # Stop the running workers, and drop the queued subproblems
+                cancel_flag.value = 1
+                for future in pending:
+                    future.cancel()
+
+        if self.limit is not None:
+            self.num_solutions = min(self.num_solutions, self.limit)
+        return first_solution
+
+
+def count_solutions(grid: Grid, limit: int = None, processes: int = None) -> int:
+    """
+    Counts the solutions of a grid in parallel.
+
+    :param grid: the grid, which is not modified
+    :param limit: stop counting once this many solutions have been found, e.g. 2 to check for a unique solution
+    :param processes: the number of worker processes, defaults to the number of CPUs
+
+    :returns: the number of solutions, capped at limit
+    """
+    solver = ParallelBacktracingSolver(Grid(grid.grid_string), processes=processes, count_solutions=True,
+                                       limit=limit)
+    solver.solve()
+    return solver.num_solutions
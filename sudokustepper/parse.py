@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lenient parsing of puzzles in the common text formats, straight into raw grid values: 81 bytes holding the cell values
+0-9, ordered left-to-right then top-to-bottom.
+
+A puzzle may be written on one line of 81 cells, or across several lines, e.g. nine lines of nine cells. Empty cells are
+written as '0', '.' or a space. Box borders drawn with '|', '+', '-' or box-drawing characters (as in str(Grid)) are
+ignored, as are spaces between cells on lines which aren't exactly 9 or 81 cells wide. Puzzles are separated by blank
+lines, or simply follow each other; lines starting with '#' are comments.
+
+Malformed puzzles are reported with their line number, and parsing carries on with the next puzzle.
+"""
+
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sudokustepper import kernels
+
+# Characters drawing box borders, which are ignored
+SEPARATORS = "|+-=:─│┌┐└┘├┤┬┴┼"
+
+_STRIP_SEPARATORS = str.maketrans("", "", SEPARATORS)
+# Translates empty cells to '0', so that a valid row is made up of digits only
+_BLANKS_TO_ZERO = str.maketrans(". ", "00")
+_FROM_DIGITS = bytes.maketrans(b"0123456789", bytes(range(10)))
+_TO_DIGITS = bytes.maketrans(bytes(range(10)), b"0123456789")
+
+
+def to_grid_string(values: bytes) -> str:
+    """
+    :param values: raw grid values
+    :returns: the values as a grid string, as used by Grid.grid_string
+    """
+    return bytes(values).translate(_TO_DIGITS).decode("ascii")
+
+
+def _cells(line: str) -> str:
+    """
+    :returns: the cells written on a line (with separators removed), as characters
+    """
+    line = line.translate(_STRIP_SEPARATORS)
+    width = len(line)
+    if width == 9 or width == 81:
+        return line
+    if width == 27 and not line[0::3].strip() and not line[2::3].strip():
+        # Each cell padded by a space either side, as in str(Grid)
+        return line[1::3]
+    return "".join(line.split())
+
+
+def describe_conflicts(conflicts: bytes) -> str:
+    """
+    :param conflicts: a flag per cell, as returned by kernels.find_conflicts
+    :returns: a message listing the cells with repeated values
+    """
+    cells = ["r{}c{}".format(i // 9 + 1, i % 9 + 1) for i, conflict in enumerate(conflicts) if conflict]
+    return "repeated values at " + ", ".join(cells)
+
+
+def _check(digits: str, validate: bool) -> Tuple[Optional[bytes], Optional[str]]:
+    """
+    :param digits: the 81 cells of a puzzle, as digits
+
+    :returns: (raw values, None), or (None, error message) if validate is set and the puzzle has repeated values
+    """
+    values = digits.encode("ascii").translate(_FROM_DIGITS)
+    if validate:
+        conflicts = kernels.find_conflicts(values)
+        if any(conflicts):
+            return None, describe_conflicts(conflicts)
+    return values, None
+
+
+def _bad_character(digits: str) -> Optional[str]:
+    if digits.isdigit() and digits.isascii():
+        return None
+    return next(c for c in digits if c not in "0123456789")
+
+
+def parse_records(lines: Iterable[str],
+                  validate: bool = True) -> Iterator[Tuple[int, str, Optional[bytes], Optional[str]]]:
+    """
+    Parses a stream of puzzles lazily, one record per puzzle or malformed puzzle.
+
+    A line of 80 or more cells is always a record of its own, so that in a file of one puzzle per line a malformed line
+    never affects the lines around it.
+
+    :param lines: the lines of text, e.g. an open file
+    :param validate: set to False to accept puzzles with repeated values in a row, column or box
+
+    :returns: an iterator of (line number, text, raw values or None, error message or None), where the line number
+              (counting from 1) is the first line of the puzzle, and the text is the puzzle's lines as read, up to the
+              error if there is one
+    """
+    pending = []
+    # The lines of the pending puzzle as read
+    pending_lines = []
+    pending_cells = 0
+    start = 0
+    # After an error in a puzzle written across several lines, the number of its cells left to skip, so that parsing
+    # resumes with the puzzle after it even if there is no blank line in between
+    skipping = 0
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            continue
+        if not stripped and len(line) != 9:
+            # A blank line ends a puzzle, unless it is a row of empty cells written as spaces
+            if pending:
+                yield start, "\n".join(pending_lines), None, "incomplete grid: {} of 81 cells".format(pending_cells)
+                pending = []
+                pending_lines = []
+                pending_cells = 0
+            skipping = 0
+            continue
+
+        cells = _cells(line)
+        if not cells:
+            # A border line
+            continue
+
+        digits = cells.translate(_BLANKS_TO_ZERO)
+        if len(cells) >= 80:
+            # A puzzle on one line, which always starts afresh
+            if pending:
+                yield start, "\n".join(pending_lines), None, "incomplete grid: {} of 81 cells".format(pending_cells)
+                pending = []
+                pending_lines = []
+                pending_cells = 0
+            skipping = 0
+
+            bad = _bad_character(digits)
+            if bad is not None:
+                yield line_number, line, None, "unexpected character {!r} on line {}".format(bad, line_number)
+            elif len(digits) == 80:
+                yield line_number, line, None, "incomplete grid: 80 of 81 cells"
+            elif len(digits) > 81:
+                yield line_number, line, None, "too many cells: {} on line {}".format(len(digits), line_number)
+            else:
+                values, error = _check(digits, validate)
+                yield line_number, line, values, error
+            continue
+
+        if skipping:
+            skipping = max(skipping - len(cells), 0)
+            continue
+
+        if not pending:
+            start = line_number
+        pending_lines.append(line)
+        bad = _bad_character(digits)
+        if bad is not None:
+            yield start, "\n".join(pending_lines), None, "unexpected character {!r} on line {}".format(
+                bad, line_number)
+            skipping = max(81 - pending_cells - len(cells), 0)
+            pending = []
+            pending_lines = []
+            pending_cells = 0
+            continue
+
+        pending.append(digits)
+        pending_cells += len(digits)
+        if pending_cells < 81:
+            continue
+        text = "\n".join(pending_lines)
+        if pending_cells > 81:
+            # The puzzle's cells have all been read, so parsing carries on with the next line
+            yield start, text, None, "too many cells: {} on lines {}-{}".format(pending_cells, start, line_number)
+            pending = []
+            pending_lines = []
+            pending_cells = 0
+            continue
+
+        values, error = _check("".join(pending), validate)
+        pending = []
+        pending_lines = []
+        pending_cells = 0
+        yield start, text, values, error
+
+    if pending:
+        yield start, "\n".join(pending_lines), None, "incomplete grid: {} of 81 cells".format(pending_cells)
+
+
+class ParsedPuzzles:
+    """
+    The puzzles parsed from a stream, stored compactly: the raw values of every puzzle in one bytearray, 81 bytes per
+    puzzle, with the line number of each puzzle alongside.
+    """
+
+    def __init__(self):
+        self.values = bytearray()
+        self.line_numbers = array("L")
+        # (line number, message) for each malformed puzzle
+        self.errors: List[Tuple[int, str]] = []
+
+    def __len__(self):
+        return len(self.line_numbers)
+
+    def __getitem__(self, i: int) -> bytes:
+        """
+        :returns: the raw values of the i-th puzzle
+        """
+        if i < 0:
+            i += len(self)
+        if i not in range(len(self)):
+            raise IndexError("puzzle index out of range")
+        return bytes(self.values[81 * i:81 * (i + 1)])
+
+    def grid_strings(self) -> Iterator[str]:
+        data = bytes(self.values).translate(_TO_DIGITS).decode("ascii")
+        for i in range(0, len(data), 81):
+            yield data[i:i + 81]
+
+
+def parse_puzzles(lines: Iterable[str], validate: bool = True) -> ParsedPuzzles:
+    """
+    Parses every puzzle in a stream, collecting the malformed ones as errors rather than stopping.
+
+    :param lines: the lines of text, e.g. an open file
+    :param validate: set to False to accept puzzles with repeated values in a row, column or box
+    """
+    parsed = ParsedPuzzles()
+    for line_number, _, values, error in parse_records(lines, validate):
+        if error is None:
+            parsed.values += values
+            parsed.line_numbers.append(line_number)
+        else:
+            parsed.errors.append((line_number, error))
+    return parsed
+
+
+def parse_grid(text: str, validate: bool = False) -> bytes:
+    """
+    Parses a single puzzle, e.g. pasted from the clipboard.
+
+    :param text: the puzzle, in any of the formats accepted by parse_records
+    :param validate: set to True to reject puzzles with repeated values in a row, column or box
+
+    :returns: the raw grid values
+
+    :raises ValueError: if the text doesn't start with a well-formed puzzle
+    """
+    for _, _, values, error in parse_records(text.splitlines(), validate):
+        if error is not None:
+            raise ValueError(error)
+        return values
+    raise ValueError("no grid found")
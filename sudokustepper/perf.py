@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+"""
+Performance regression checks: micro benchmarks of the grid operations the solvers rely on, and macro benchmarks of each
+solver on fixed puzzles, compared against the baseline stored alongside this module in perf_baseline.json.
+
+Times are compared relative to a calibration loop of plain Python, so that a baseline recorded on one machine roughly
+holds on another. A benchmark fails if it has slowed down by more than the tolerance. Several benchmarks run on the
+compiled kernels when they're built, so the file holds a baseline for each build: with the kernels ("native") and
+without them ("python"). A build without a recorded baseline only prints its times.
+
+    python -m sudokustepper.perf            # compare against the baseline, exiting with status 1 on a slowdown
+    python -m sudokustepper.perf --update   # record a new baseline for the current build
+
+The check also runs under pytest (tests/test_perf.py), unless the SUDOKUSTEPPER_SKIP_PERF environment variable is set.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from copy import deepcopy
+from typing import Callable, List, Optional
+
+from sudokustepper import kernels, solvers
+from sudokustepper.grid import Grid
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf_baseline.json")
+
+# The slowdown, as a fraction of the baseline time, beyond which a benchmark fails
+TOLERANCE = 0.25
+
+# The number of times each benchmark is run, keeping the fastest to filter out noise
+REPEAT = 5
+
+# The time, in seconds, per benchmark for which the benchmarks keep being rerun after REPEAT runs, so that quick
+# benchmarks get enough runs for their fastest to be reliable
+MIN_TIME = 0.25
+
+# The number of times the benchmarks which seem to have slowed down are measured again, keeping their best
+# measurement, before they're reported: a short slow spell of the machine can spoil every run of a quick benchmark
+RETRIES = 2
+
+# The number of measurements of each benchmark a new baseline is the median of, so that it isn't set by a lucky run
+UPDATE_RUNS = 3
+
+# Solvers without a macro benchmark: the portfolio's choice of engine depends on the latency model it has learnt, and
+# the parallel solver's time is dominated by starting its worker processes
+SKIPPED_SOLVERS = ("portfolio", "parallel")
+
+# The puzzle used by the micro benchmarks
+PUZZLE = "000070500210000048050080120070000300800000052631000080000650004980001600000009003"
+
+# PUZZLE with a repeated 7 in the first row, so that validation can't take its fast path
+CONFLICT_PUZZLE = "700070500210000048050080120070000300800000052631000080000650004980001600000009003"
+
+# The puzzles each solver is timed on, which take the in-order BacktracingSolver a few thousand steps each
+MACRO_PUZZLES = (
+    "000070500210000048050080120070000300800000052631000080000650004980001600000009003",
+    "000200700007509300000004089040050010602400000095000607061007908874090000509010000",
+    "000000000900300740023000096200000500704020361630005028007001609800006000309054100",
+)
+
+# The puzzle for solvers which take exponential time on ordinary puzzles, with only a few empty cells
+SLOW_SOLVER_PUZZLE = "862341957573269841910007023009510460080602070025034100240173589008000716050986234"
+
+# The number of operations in each run of a micro benchmark
+_MICRO_NUMBER = 1000
+
+
+def _calibrate():
+    total = 0
+    for i in range(200000):
+        total += i * i % 7
+    return total
+
+
+class Benchmark:
+    """
+    A timed piece of work, run several times to keep the fastest time.
+    """
+
+    def __init__(self, name: str, run: Callable, setup: Callable = None, number: int = 1):
+        """
+        :param name: the benchmark's name, as stored in the baseline
+        :param run: the function timed, called with the result of setup
+        :param setup: an untimed function called before each run, returning the argument for run
+        :param number: the number of operations in each run, so that the time of one operation is reported
+        """
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.number = number
+
+    def time(self, repeat: int = REPEAT) -> float:
+        """
+        :returns: the fastest time of one operation, in seconds
+        """
+        best = float("inf")
+        for _ in range(repeat):
+            arg = self.setup() if self.setup is not None else None
+            # As timeit does, keep the garbage collector out of the timings, since when it runs depends on whatever
+            # ran before
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                self.run(arg)
+                best = min(best, time.perf_counter() - start)
+            finally:
+                gc.enable()
+        return best / self.number
+
+
+def _validate(grid: Grid):
+    for _ in range(_MICRO_NUMBER):
+        grid.validate()
+
+
+def _possible_values(grid: Grid):
+    coords = grid.empty_cell_coords()
+    for _ in range(_MICRO_NUMBER):
+        for x, y in coords:
+            grid.possible_values_for_cell(x, y)
+
+
+def _parse(grid: Grid):
+    for _ in range(_MICRO_NUMBER):
+        grid.grid_string = PUZZLE
+
+
+def _copy(grid: Grid):
+    for _ in range(_MICRO_NUMBER):
+        deepcopy(grid)
+
+
+def _solve_all(solver_name: str, puzzles: List[str]) -> Callable:
+    info = solvers.ALL_SOLVERS.info(solver_name)
+
+    def setup():
+        return [info.create(Grid(puzzle), record_steps=False) for puzzle in puzzles]
+
+    def run(solver_list):
+        for solver in solver_list:
+            if not solver.solve():
+                raise RuntimeError("{} didn't solve {}".format(solver_name, solver.grid.grid_string))
+
+    return Benchmark("solver." + solver_name, run, setup, len(puzzles))
+
+
+def benchmarks() -> List[Benchmark]:
+    """
+    :returns: the micro benchmarks, then a macro benchmark for each registered solver
+    """
+    num_empty = len(Grid(PUZZLE).empty_cell_coords())
+    result = [
+        Benchmark("grid.validate", _validate, lambda: Grid(PUZZLE), _MICRO_NUMBER),
+        Benchmark("grid.validate_conflicts", _validate, lambda: Grid(CONFLICT_PUZZLE), _MICRO_NUMBER),
+        Benchmark("grid.possible_values_for_cell", _possible_values, lambda: Grid(PUZZLE),
+                  _MICRO_NUMBER * num_empty),
+        Benchmark("grid.grid_string", _parse, lambda: Grid(PUZZLE), _MICRO_NUMBER),
+        Benchmark("grid.copy", _copy, lambda: Grid(PUZZLE), _MICRO_NUMBER),
+    ]
+    for name in solvers.ALL_SOLVERS.names(grid_size=9):
+        if name in SKIPPED_SOLVERS:
+            continue
+        puzzles = [SLOW_SOLVER_PUZZLE] if solvers.ALL_SOLVERS.info(name).slow else list(MACRO_PUZZLES)
+        result.append(_solve_all(name, puzzles))
+    return result
+
+
+def measure(selected: List[Benchmark], repeat: int = REPEAT, min_time: float = MIN_TIME) -> dict:
+    """
+    :param repeat: the least number of runs of each benchmark
+    :param min_time: the least time, in seconds, spent running the benchmarks, per benchmark
+
+    :returns: the results, in the format of the baseline file: the time of one operation of each benchmark, and the
+              time of the calibration loop measured alongside it, in seconds
+    """
+    calibration = Benchmark("calibration", lambda _: _calibrate())
+    # A warm-up run gives the CPU a chance to reach its full clock speed
+    calibration.time(repeat)
+
+    # Each run is paired with a calibration run, so that a change in the machine's speed during the check affects both
+    # alike. The benchmarks take turns, so that a slow spell is spread across all of them rather than spoiling every run
+    # of one
+    times = {benchmark.name: float("inf") for benchmark in selected}
+    calibrations = dict(times)
+    rounds = 0
+    start = time.perf_counter()
+    while rounds < repeat or time.perf_counter() - start < min_time * len(selected):
+        for benchmark in selected:
+            calibrations[benchmark.name] = min(calibrations[benchmark.name], calibration.time(1))
+            times[benchmark.name] = min(times[benchmark.name], benchmark.time(1))
+        rounds += 1
+    return {
+        "benchmarks": times,
+        "calibrations": calibrations,
+    }
+
+
+def median(runs: List[dict]) -> dict:
+    """
+    :param runs: results returned by measure()
+
+    :returns: results holding, for each benchmark, its measurement (and calibration) with the median calibrated time
+    """
+    result = {"benchmarks": {}, "calibrations": {}}
+    for name in runs[0]["benchmarks"]:
+        ordered = sorted(runs, key=lambda run: run["benchmarks"][name] / run["calibrations"][name])
+        middle = ordered[len(ordered) // 2]
+        result["benchmarks"][name] = middle["benchmarks"][name]
+        result["calibrations"][name] = middle["calibrations"][name]
+    return result
+
+
+def build() -> str:
+    """
+    :returns: the name of the current build's baseline: "native" if the compiled kernels are in use, otherwise "python"
+    """
+    return "native" if kernels.NATIVE else "python"
+
+
+def load_baselines(baseline_path: str = BASELINE_PATH) -> dict:
+    """
+    :returns: the baseline of each build, in the format returned by measure(), or an empty dict if there's no file
+    """
+    if not os.path.exists(baseline_path):
+        return {}
+    with open(baseline_path, "r") as f:
+        return json.load(f)["baselines"]
+
+
+def _change(results: dict, baseline: dict, name: str) -> Optional[float]:
+    """
+    :returns: the change in a benchmark's time against its baseline, as a fraction of the baseline time, after scaling
+              both by their calibration times, or None if the benchmark has no baseline
+    """
+    base = baseline.get("benchmarks", {}).get(name)
+    if base is None:
+        return None
+    scale = baseline["calibrations"][name] / results["calibrations"][name]
+    return results["benchmarks"][name] * scale / base - 1
+
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE, out=sys.stdout) -> bool:
+    """
+    Prints each benchmark's time against its baseline, both scaled by their calibration times.
+
+    :returns: True if no benchmark has slowed down by more than the tolerance
+    """
+    passed = True
+    print("build: {}".format(build()), file=out)
+    print("{:<32} {:>14} {:>14} {:>9}".format("benchmark", "baseline (us)", "now (us)", "change"), file=out)
+    for name, elapsed in results["benchmarks"].items():
+        change = _change(results, baseline, name)
+        if change is None:
+            print("{:<32} {:>14} {:>14.2f} {:>9}".format(name, "-", elapsed * 1e6, "new"), file=out)
+            continue
+
+        status = ""
+        if change > tolerance:
+            status = "  SLOWER"
+            passed = False
+        print("{:<32} {:>14.2f} {:>14.2f} {:>+8.0%}{}".format(
+            name, baseline["benchmarks"][name] * 1e6, elapsed * 1e6, change, status), file=out)
+    return passed
+
+
+def check(tolerance: float = TOLERANCE, baseline_path: str = BASELINE_PATH, pattern: Optional[str] = None,
+          out=sys.stdout) -> bool:
+    """
+    Runs the benchmarks and compares them against the stored baseline of the current build.
+
+    :param pattern: only run the benchmarks whose names contain this
+
+    :returns: True if no benchmark has slowed down by more than the tolerance, which holds if the current build has no
+              baseline
+    """
+    baseline = load_baselines(baseline_path).get(build(), {})
+    selected = [b for b in benchmarks() if pattern is None or pattern in b.name]
+    results = measure(selected)
+    for _ in range(RETRIES):
+        slower = [b for b in selected if (_change(results, baseline, b.name) or 0) > tolerance]
+        if not slower:
+            break
+        retried = measure(slower)
+        for benchmark in slower:
+            # The measurement with the lower scaled time is kept, together with its calibration
+            if _change(retried, baseline, benchmark.name) < _change(results, baseline, benchmark.name):
+                results["benchmarks"][benchmark.name] = retried["benchmarks"][benchmark.name]
+                results["calibrations"][benchmark.name] = retried["calibrations"][benchmark.name]
+    return compare(results, baseline, tolerance, out)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Check the solvers for performance regressions")
+    parser.add_argument("--update", action="store_true", help="record a new baseline instead of comparing")
+    parser.add_argument("-t", "--tolerance", type=float, default=TOLERANCE,
+                        help="the allowed slowdown, as a fraction of the baseline time")
+    parser.add_argument("-b", "--baseline", default=BASELINE_PATH, help="the baseline file")
+    parser.add_argument("-k", "--pattern", help="only run the benchmarks whose names contain this")
+    args = parser.parse_args(argv)
+
+    if args.update:
+        # The other build's baseline is kept, so that both can be recorded by running this with and without the kernels
+        baselines = load_baselines(args.baseline)
+        selected = benchmarks()
+        baselines[build()] = median([measure(selected) for _ in range(UPDATE_RUNS)])
+        with open(args.baseline, "w") as f:
+            json.dump({"version": 3, "baselines": baselines}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Recorded {} benchmarks in {} for the {} build".format(len(baselines[build()]["benchmarks"]),
+                                                                      args.baseline, build()))
+        return
+
+    if not check(args.tolerance, args.baseline, args.pattern):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+
+"""
+A portfolio solver, which picks the solver expected to be fastest for each puzzle from the solve times of similar
+puzzles, and can race the two best candidates against each other on hard puzzles.
+
+Puzzles are grouped by two cheap features: the number of clues, and the entropy of the initial candidates (the sum,
+over the empty cells, of log2 of the number of possible values). The solve times are learnt from batch result files
+(python -m sudokustepper.portfolio results.jsonl), and from the portfolio's own solves: until every engine has
+MIN_SAMPLES solves in a puzzle's bucket, the portfolio takes turns between them, rather than only ever running the one
+it knows. Those are only kept if asked for
+(see persist_default_model, or sudokustepper-batch --save-model), and are then merged into MODEL_PATH when the process
+exits, so that processes saving at once don't lose each other's solves.
+"""
+
+import argparse
+import atexit
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sudokustepper import solvers, workers
+from sudokustepper.grid import MASK_POPCOUNT, Grid
+from sudokustepper.instrumentation import SolverStats
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Where the latency model is kept between runs
+MODEL_PATH = os.path.join(os.path.expanduser("~"), ".sudokustepper", "portfolio.json")
+
+# The solver used for puzzles unlike any seen before
+DEFAULT_ENGINE = "bitboard"
+
+# Widths of the feature buckets: puzzles in the same bucket are considered similar
+CLUES_BUCKET = 4
+ENTROPY_BUCKET = 8.0
+
+# The number of solves of an engine in a bucket before its average is trusted
+MIN_SAMPLES = 3
+
+# Seconds added to an engine's total time for each puzzle it gave up on
+FAILURE_PENALTY = 1.0
+
+# Puzzles whose best expected time (in seconds) exceeds this are raced, if racing is enabled
+RACE_THRESHOLD = 0.05
+
+
+def features(grid: Grid) -> Tuple[int, float]:
+    """
+    :returns: a tuple (number of clues, entropy of the initial candidates in bits)
+    """
+    clues = 0
+    entropy = 0.0
+    masks = grid.candidate_masks()
+    for i, cell in enumerate(grid.flattened()):
+        if cell.empty:
+            num_candidates = MASK_POPCOUNT[masks[i]]
+            if num_candidates > 1:
+                entropy += math.log2(num_candidates)
+        else:
+            clues += 1
+    return clues, entropy
+
+
+def bucket(clues: int, entropy: float) -> str:
+    return "{}:{}".format(clues // CLUES_BUCKET, int(entropy // ENTROPY_BUCKET))
+
+
+class LatencyModel:
+    """
+    The solve times of each engine, per feature bucket.
+    """
+
+    def __init__(self):
+        # bucket -> engine -> [solves, total time, failures]
+        self.buckets: Dict[str, Dict[str, List[float]]] = {}
+        # The solves recorded since the model was loaded or saved, in the same format, which are added to the file's
+        # latest contents on saving
+        self._unsaved: Dict[str, Dict[str, List[float]]] = {}
+
+    @property
+    def modified(self) -> bool:
+        """
+        True if solves have been recorded since the model was loaded or saved
+        """
+        return bool(self._unsaved)
+
+    def record(self, key: str, engine: str, wall_time: float, solved: bool) -> None:
+        for buckets in (self.buckets, self._unsaved):
+            entry = buckets.setdefault(key, {}).setdefault(engine, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += wall_time
+            if not solved:
+                entry[2] += 1
+
+    def learn(self, records: Iterable[dict]) -> int:
+        """
+        Learns from batch result records (see sudokustepper.batch), skipping records without a solve time, and records
+        of solvers which aren't engines, such as the portfolio itself.
+
+        :returns: the number of records learnt from
+        """
+        engines = PortfolioSolver.engines()
+        num_records = 0
+        for record in records:
+            if record.get("wall_time") is None or record.get("solver") not in engines:
+                continue
+            if record.get("status") not in ("solved", "unsolved"):
+                continue
+            grid = Grid(record["puzzle"])
+            self.record(bucket(*features(grid)), record["solver"], record["wall_time"], record["status"] == "solved")
+            num_records += 1
+        return num_records
+
+    def ranking(self, key: str, engines: List[str]) -> List[Tuple[float, str]]:
+        """
+        :returns: (expected time, engine) for the engines with enough solves in the bucket, fastest first
+        """
+        ranking = []
+        for engine, (count, total, failures) in self.buckets.get(key, {}).items():
+            if engine in engines and count >= MIN_SAMPLES:
+                ranking.append(((total + failures * FAILURE_PENALTY) / count, engine))
+        ranking.sort()
+        return ranking
+
+    def samples(self, key: str, engine: str) -> int:
+        """
+        :returns: the number of solves of the engine in the bucket
+        """
+        return int(self.buckets.get(key, {}).get(engine, (0,))[0])
+
+    def load(self, path: str) -> None:
+        with open(path, "r") as f:
+            self.buckets = json.load(f)["buckets"]
+        self._unsaved = {}
+
+    def save(self, path: str) -> None:
+        """
+        Adds the solves recorded since the model was loaded or last saved to the model file, keeping the solves saved
+        there by other processes in the meantime. The model is then updated to the file's new contents.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with _locked(path):
+            buckets = {}
+            if os.path.exists(path):
+                try:
+                    with open(path, "r") as f:
+                        buckets = json.load(f)["buckets"]
+                except (ValueError, KeyError):
+                    # An unreadable model is replaced
+                    pass
+            for key, engines in self._unsaved.items():
+                for engine, (count, total, failures) in engines.items():
+                    entry = buckets.setdefault(key, {}).setdefault(engine, [0, 0.0, 0])
+                    entry[0] += count
+                    entry[1] += total
+                    entry[2] += failures
+
+            # Written to a temporary file first, so that another process never reads a partly written model
+            temp_path = "{}.{}.tmp".format(path, os.getpid())
+            with open(temp_path, "w") as f:
+                json.dump({"version": 1, "buckets": buckets}, f)
+            os.replace(temp_path, path)
+        self.buckets = buckets
+        self._unsaved = {}
+
+
+@contextmanager
+def _locked(path: str):
+    """
+    Context manager holding an exclusive lock on path + ".lock" between processes, waiting for it if needed.
+    """
+    with open(path + ".lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_default_model: Optional[LatencyModel] = None
+
+# Where the default model is saved when the process exits, if persist_default_model has been called
+_persist_path: Optional[str] = None
+
+
+def default_model() -> LatencyModel:
+    """
+    :returns: the model shared by portfolio solvers, loaded from MODEL_PATH if it exists
+    """
+    global _default_model
+    if _default_model is None:
+        _default_model = LatencyModel()
+        if os.path.exists(MODEL_PATH):
+            try:
+                _default_model.load(MODEL_PATH)
+            except (OSError, ValueError, KeyError):
+                pass
+    return _default_model
+
+
+def persist_default_model(path: str = MODEL_PATH) -> None:
+    """
+    Saves the solves the default model learns in this process to path when the process exits. This is off unless
+    asked for, so that processes which merely solve puzzles, such as difftest or prefetch workers, leave the model
+    file alone.
+
+    :param path: the model file, which the solves are merged into
+    """
+    global _persist_path
+    if _persist_path is None:
+        atexit.register(_save_default_model)
+    _persist_path = path
+
+
+def _save_default_model() -> None:
+    if _default_model is None or not _default_model.modified:
+        return
+    try:
+        _default_model.save(_persist_path)
+    except OSError:
+        # The model only speeds up later solves, so losing its latest solves is no reason to fail
+        pass
+
+
+def _run_engine(engine: str, grid_string: str) -> Tuple[str, Optional[str], SolverStats, bool]:
+    """
+    Worker entry point. The pool's shared value (see workers.shared) is set to 1 once the race is over, to stop the
+    loser.
+
+    :returns: a tuple (engine, solution grid string or None, stats, True if cancelled)
+    """
+    solver = solvers.ALL_SOLVERS.info(engine).create(Grid(grid_string), record_steps=False)
+    with workers.cancel_when(solver, lambda: workers.shared.value):
+        solved = solver.solve()
+    return engine, solver.grid.grid_string if solved else None, solver.stats, solver.cancelled
+
+
+class PortfolioSolver(solvers.Solver):
+    """
+    Solves the grid with the engine expected to be fastest for similar puzzles. If that is expected to be slow, the two
+    best engines race in separate processes, and the loser is cancelled. While an engine has too few solves of similar
+    puzzles to be ranked, it is tried instead. Steps are not recorded.
+
+    The engine used is stored in engine, and the engine's counters are copied into stats.
+    """
+
+    traceable = False
+    supports_budgets = False
+    parallel = True
+
+    def __init__(self, grid: Grid, delegate=None, profile: Optional[str] = None, model: LatencyModel = None,
+                 race: bool = True, race_threshold: float = RACE_THRESHOLD, explore: bool = True):
+        """
+        :param model: the latency model to choose with and learn into, defaults to default_model()
+        :param race: set to False to never race engines
+        :param race_threshold: race the puzzle if the best expected time exceeds this many seconds
+        :param explore: set to False to always pick the best known engine (or DEFAULT_ENGINE), even while other engines
+                        have too few solves in the puzzle's bucket to be ranked
+        """
+        super().__init__(grid, delegate, profile, record_steps=False)
+        self.model: LatencyModel = model if model is not None else default_model()
+        self.race: bool = race
+        self.race_threshold: float = race_threshold
+        self.explore: bool = explore
+        self.engine: Optional[str] = None
+        self.raced: bool = False
+
+    @staticmethod
+    def engines() -> List[str]:
+        """
+        :returns: the names of the solvers the portfolio chooses between, leaving out slow ones, which are never the
+                  fastest
+        """
+        return solvers.ALL_SOLVERS.names(parallel=False, slow=False, grid_size=9)
+
+    def _solve(self):
+        if not self._grid_valid():
+            return False
+
+        with self._phase("features"):
+            key = bucket(*features(self.grid))
+            engines = self.engines()
+            ranking = self.model.ranking(key, engines)
+            # The engine with the fewest solves in the bucket, first in engines on a tie, so that the engines take turns
+            least_known = min(engines, key=lambda engine: self.model.samples(key, engine))
+
+        with self._phase("search"):
+            if self.explore and self.model.samples(key, least_known) < MIN_SAMPLES:
+                solution = self._run(key, least_known)
+                if solution is None and not solvers.ALL_SOLVERS[least_known].complete:
+                    # An incomplete engine giving up doesn't mean the puzzle has no solution
+                    solution = self._choose_and_run(key, ranking)
+            else:
+                solution = self._choose_and_run(key, ranking)
+
+        if solution is None:
+            return False
+
+        for cell, value in zip(self.grid.flattened(), solution):
+            cell.value = int(value)
+        return self._grid_solved()
+
+    def _choose_and_run(self, key: str, ranking: List[Tuple[float, str]]) -> Optional[str]:
+        """
+        Runs the best engine in the ranking, or races the two best if they're expected to be slow.
+
+        :returns: the solution grid string, or None
+        """
+        # Only engines which can be cancelled can race
+        racers = [engine for _, engine in ranking if solvers.ALL_SOLVERS.info(engine).supports_budgets][:2]
+        if self.race and len(racers) == 2 and ranking[0][0] > self.race_threshold:
+            self.raced = True
+            return self._race(key, racers)
+        return self._run(key, ranking[0][1] if ranking else DEFAULT_ENGINE)
+
+    def _use_stats(self, engine: str, stats: SolverStats) -> None:
+        self.engine = engine
+        self.stats.steps += stats.steps
+        self.stats.backtracks += stats.backtracks
+        self.stats.restarts += stats.restarts
+        self.stats.backjumps += stats.backjumps
+        self.stats.candidate_lookups += stats.candidate_lookups
+        self.stats.validations += stats.validations
+
+    def _run(self, key: str, engine: str) -> Optional[str]:
+        solver = solvers.ALL_SOLVERS.info(engine).create(Grid(self.grid.grid_string), record_steps=False)
+        solved = solver.solve()
+        self.model.record(key, engine, solver.stats.wall_time, solved)
+        self._use_stats(engine, solver.stats)
+        return solver.grid.grid_string if solved else None
+
+    def _race(self, key: str, engines: List[str]) -> Optional[str]:
+        race_over = multiprocessing.RawValue("B", 0)
+        grid_string = self.grid.grid_string
+        solution = None
+        with ProcessPoolExecutor(max_workers=len(engines), initializer=workers.init_worker,
+                                 initargs=(race_over,)) as executor:
+            pending = {executor.submit(_run_engine, engine, grid_string) for engine in engines}
+            try:
+                finished = False
+                while pending and not finished:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        engine, engine_solution, stats, cancelled = future.result()
+                        if cancelled:
+                            continue
+                        self.model.record(key, engine, stats.wall_time, engine_solution is not None)
+                        # An incomplete engine giving up doesn't settle the race, but a complete one does
+                        if engine_solution is not None or solvers.ALL_SOLVERS[engine].complete:
+                            self._use_stats(engine, stats)
+                            solution = engine_solution
+                            finished = True
+                            break
+            finally:
+                # Stop the loser
+                race_over.value = 1
+        return solution
+
+
+def read_records(paths: Iterable[str]) -> Iterable[dict]:
+    for path in paths:
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Learn which solver to pick from batch results")
+    parser.add_argument("results", nargs="+", help="JSON Lines result files written by sudokustepper-batch")
+    parser.add_argument("-m", "--model", default=MODEL_PATH, help="the model file to update")
+    args = parser.parse_args(argv)
+
+    model = LatencyModel()
+    if os.path.exists(args.model):
+        model.load(args.model)
+    num_records = model.learn(read_records(args.results))
+    model.save(args.model)
+    print("Learnt from {} results, {} feature buckets in {}".format(num_records, len(model.buckets), args.model))
+
+
+if __name__ == "__main__":
+    main()
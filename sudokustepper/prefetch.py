@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+"""
+Speculative solving of puzzles in a background worker process, so that a result is often ready before it is asked for.
+
+Each result holds the solution, the solver's stats, and its step history written to a temporary trace file, which can be
+played back with a TraceReader without re-running the solver.
+"""
+
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from sudokustepper import solvers, workers
+from sudokustepper.grid import Grid
+from sudokustepper.instrumentation import SolverStats
+from sudokustepper.trace import FILE_EXTENSION, write_trace
+
+# The number of results kept, most recently used first
+CACHE_SIZE = 8
+
+
+class PrefetchResult:
+    def __init__(self, grid_string: str, solver_name: str, solution: Optional[str], stats: SolverStats,
+                 trace_path: str, step_descriptions: Optional[List[str]]):
+        """
+        :param grid_string: the puzzle
+        :param solver_name: the key of solvers.ALL_SOLVERS used to solve it
+        :param solution: the solved grid string, or None if the solver found no solution
+        :param stats: the solver's stats
+        :param trace_path: the trace file holding the solver's steps, owned by the Prefetcher
+        :param step_descriptions: the description of each step, if the solver provides them
+        """
+        self.grid_string = grid_string
+        self.solver_name = solver_name
+        self.solution = solution
+        self.stats = stats
+        self.trace_path = trace_path
+        self.step_descriptions = step_descriptions
+
+
+def _solve(grid_string: str, solver_name: str, trace_path: str, generation: int,
+           memory_limit: Optional[int]) -> Optional[PrefetchResult]:
+    """
+    Worker entry point. The pool's shared value (see workers.shared) is the generation of the most recent request, which
+    any older solve stops for.
+
+    :returns: the result, or None if the solve was superseded by a newer request
+    """
+    def superseded():
+        return workers.shared.value != generation
+
+    if superseded():
+        return None
+
+    solver = solvers.ALL_SOLVERS.info(solver_name).create(Grid(grid_string), memory_limit=memory_limit)
+    with workers.cancel_when(solver, superseded):
+        solved = solver.solve()
+    if solver.cancelled:
+        return None
+
+    write_trace(trace_path, Grid(grid_string), solver.step_history)
+    step_descriptions = None
+    if solver.step_description(1) is not None:
+        step_descriptions = [solver.step_description(step) for step in range(1, len(solver.step_history) + 1)]
+    return PrefetchResult(grid_string, solver_name, solver.grid.grid_string if solved else None, solver.stats,
+                          trace_path, step_descriptions)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        # Already removed, or still open on a platform which can't remove open files
+        pass
+
+
+class Prefetcher:
+    """
+    Solves one puzzle at a time in a background worker process, keeping the most recent results. Requesting a new
+    puzzle cancels the solve in progress. The worker process is only started on the first request.
+    """
+
+    def __init__(self, memory_limit: Optional[int] = None, cache_size: int = CACHE_SIZE):
+        """
+        :param memory_limit: the memory limit for each solve, see Solver
+        :param cache_size: the number of results to keep
+        """
+        self.memory_limit = memory_limit
+        self.cache_size = cache_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._generation = None
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], PrefetchResult]" = OrderedDict()
+        self._pending_key: Optional[Tuple[str, str]] = None
+        self._pending: Optional[Future] = None
+
+    def prefetch(self, grid_string: str, solver_name: str) -> Optional[Future]:
+        """
+        Starts solving a puzzle in the background, unless its result is already cached or being solved. Solvers which
+        take exponential time on ordinary puzzles are never run speculatively, as most of their solves would be wasted.
+
+        :returns: the future of the solve, or None if the result is already cached or the solver is too slow
+        """
+        if solvers.ALL_SOLVERS.info(solver_name).slow:
+            self.cancel()
+            return None
+
+        key = (grid_string, solver_name)
+        with self._lock:
+            if key in self._cache:
+                return None
+            if key == self._pending_key:
+                return self._pending
+
+        self.cancel()
+        if self._executor is None:
+            # Forking a process with other threads running, as the GUI has, can deadlock the child
+            context = multiprocessing.get_context("spawn")
+            self._generation = context.Value("q", 0, lock=False)
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=workers.init_worker,
+                                                 initargs=(self._generation,))
+
+        self._generation.value += 1
+        fd, trace_path = tempfile.mkstemp(suffix=FILE_EXTENSION)
+        os.close(fd)
+        future = self._executor.submit(_solve, grid_string, solver_name, trace_path, self._generation.value,
+                                       self.memory_limit)
+        with self._lock:
+            self._pending_key = key
+            self._pending = future
+        future.add_done_callback(lambda f: self._solve_done(key, trace_path, f))
+        return future
+
+    def _solve_done(self, key: Tuple[str, str], trace_path: str, future: Future) -> None:
+        result = None if future.cancelled() or future.exception() is not None else future.result()
+        with self._lock:
+            if self._pending is future:
+                self._pending_key = None
+                self._pending = None
+            if result is None:
+                _remove(trace_path)
+                return
+
+            self._cache[key] = result
+            self._cache.move_to_end(key, last=False)
+            while len(self._cache) > self.cache_size:
+                _remove(self._cache.popitem()[1].trace_path)
+
+    def result(self, grid_string: str, solver_name: str) -> Optional[PrefetchResult]:
+        """
+        :returns: the cached result for the puzzle, or None if it hasn't been solved yet
+        """
+        key = (grid_string, solver_name)
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key, last=False)
+            return result
+
+    def pending(self, grid_string: str, solver_name: str) -> Optional[Future]:
+        """
+        :returns: the future of the puzzle's solve if it is in progress, otherwise None
+        """
+        with self._lock:
+            return self._pending if self._pending_key == (grid_string, solver_name) else None
+
+    def cancel(self) -> None:
+        """
+        Cancels the solve in progress, if there is one.
+        """
+        with self._lock:
+            future = self._pending
+            self._pending_key = None
+            self._pending = None
+        if future is not None:
+            future.cancel()
+            # A newer generation stops a running solve at its next step
+            self._generation.value += 1
+
+    def close(self) -> None:
+        """
+        Stops the worker process and removes the trace files of every result.
+        """
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        with self._lock:
+            for result in self._cache.values():
+                _remove(result.trace_path)
+            self._cache.clear()
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+"""
+A registry of solvers by name, with the capabilities of each, so that frontends can pick the solvers which suit them.
+
+Solvers are imported lazily, the first time they are used. Besides the built-in solvers, other packages can provide
+solvers through the "sudokustepper.solvers" entry point group, each loaded the first time its capabilities or class are
+needed, e.g. in setup.py:
+
+    entry_points={
+        "sudokustepper.solvers": [
+            "tuned = mypackage.sudoku:tuned_solver",
+        ],
+    }
+
+The entry point may name a Solver subclass, whose capabilities are read from its class attributes, or a SolverInfo,
+which declares the capabilities itself and names the class to import only when the solver is used, e.g.
+
+    tuned_solver = SolverInfo("tuned", "mypackage.sudoku_tuned:TunedSolver", parallel=True)
+"""
+
+import importlib
+import warnings
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+ENTRY_POINT_GROUP = "sudokustepper.solvers"
+
+# The capabilities of a solver, matching the class attributes of Solver
+CAPABILITIES = ("traceable", "supports_budgets", "parallel", "grid_sizes", "slow")
+
+
+class SolverInfo:
+    """
+    A solver's name and capabilities, and the class implementing it, which is only imported when first needed.
+    """
+
+    def __init__(self, name: str, target: Union[type, str, "importlib.metadata.EntryPoint"], traceable: bool = True,
+                 supports_budgets: bool = True, parallel: bool = False, grid_sizes: Tuple[int, ...] = (9,),
+                 slow: bool = False):
+        """
+        :param name: the solver's name, as shown to users
+        :param target: the Solver subclass, or its import path as "module:ClassName", or an entry point naming either a
+                       Solver subclass or a SolverInfo, which is only loaded when needed and then provides the
+                       capabilities in place of those given here
+        :param traceable: True if the solver records its steps in step_history, for playback
+        :param supports_budgets: True if the solver accepts a memory_limit and can be cancelled
+        :param parallel: True if the solver runs in several processes
+        :param grid_sizes: the grid sizes (cells per side) the solver can solve
+        :param slow: True if the solver takes exponential time on ordinary puzzles, so that tools solving many puzzles
+                     leave it out
+        """
+        self.name = name
+        self._target = target
+        self._cls: Optional[type] = target if isinstance(target, type) else None
+        if isinstance(target, (type, str)):
+            self.traceable = traceable
+            self.supports_budgets = supports_budgets
+            self.parallel = parallel
+            self.grid_sizes = tuple(grid_sizes)
+            self.slow = slow
+
+    def __getattr__(self, name: str):
+        # Only called for missing attributes: the capabilities of a solver whose entry point hasn't been loaded yet
+        if name not in CAPABILITIES or isinstance(self.__dict__.get("_target", ""), (type, str)):
+            raise AttributeError(name)
+        self._load_entry_point()
+        return getattr(self, name)
+
+    def _load_entry_point(self) -> None:
+        target = self._target.load()
+        if isinstance(target, SolverInfo):
+            self._target, self._cls = target._target, target._cls
+        else:
+            self._target = self._cls = target
+        for capability in CAPABILITIES:
+            setattr(self, capability, getattr(target, capability))
+        self.grid_sizes = tuple(self.grid_sizes)
+
+    @classmethod
+    def from_class(cls, name: str, solver_cls: type) -> "SolverInfo":
+        """
+        :returns: the info for a Solver subclass, with the capabilities declared by its class attributes
+        """
+        return cls(name, solver_cls, **{capability: getattr(solver_cls, capability) for capability in CAPABILITIES})
+
+    @property
+    def loaded(self) -> bool:
+        return self._cls is not None
+
+    def load(self) -> type:
+        """
+        :returns: the Solver subclass, importing it on first use
+        """
+        if not isinstance(self._target, (type, str)):
+            self._load_entry_point()
+        if self._cls is None:
+            module_name, _, attr = self._target.partition(":")
+            self._cls = getattr(importlib.import_module(module_name), attr)
+        return self._cls
+
+    def matches(self, **capabilities) -> bool:
+        """
+        :param capabilities: required capability values, e.g. traceable=True, or grid_size=9 for a supported grid size
+        """
+        for capability, value in capabilities.items():
+            if capability == "grid_size":
+                if value not in self.grid_sizes:
+                    return False
+            elif capability not in CAPABILITIES:
+                raise ValueError("unknown capability: {}".format(capability))
+            elif getattr(self, capability) != value:
+                return False
+        return True
+
+    def create(self, grid, **options):
+        """
+        Creates the solver, leaving out the options its capabilities don't allow for: record_steps for solvers which
+        aren't traceable, and memory_limit and memory_policy for solvers which don't support budgets.
+
+        :param grid: the grid to solve
+        :param options: keyword arguments for the solver's constructor
+        """
+        if not self.traceable:
+            options.pop("record_steps", None)
+        if not self.supports_budgets:
+            options.pop("memory_limit", None)
+            options.pop("memory_policy", None)
+        return self.load()(grid, **options)
+
+    def __repr__(self):
+        return "<SolverInfo %s%s>" % (self.name, "" if self.loaded else " (not loaded)")
+
+
+def _entry_points() -> list:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    return list(eps.get(ENTRY_POINT_GROUP, []))
+
+
+class SolverRegistry(MutableMapping):
+    """
+    Maps solver names to Solver subclasses, importing each class on first access. Solvers provided through entry points
+    are discovered the first time the registry is read, but only loaded once their capabilities or class are needed.
+
+    Assigning a class to a name registers it, with the capabilities declared by its class attributes.
+    """
+
+    def __init__(self, discover: bool = True):
+        """
+        :param discover: set to False to ignore solvers provided through entry points
+        """
+        self._infos: Dict[str, SolverInfo] = {}
+        self._discovered = not discover
+
+    def register(self, name: str, target: Union[type, str], **capabilities) -> SolverInfo:
+        """
+        Registers a solver, replacing any solver of the same name.
+
+        :param name: the solver's name
+        :param target: the Solver subclass, or its import path as "module:ClassName"
+        :param capabilities: see SolverInfo; if target is a class, these default to its class attributes
+
+        :returns: the registered solver's info
+        """
+        if isinstance(target, type) and not capabilities:
+            info = SolverInfo.from_class(name, target)
+        else:
+            info = SolverInfo(name, target, **capabilities)
+        self._infos[name] = info
+        return info
+
+    def _discover(self) -> None:
+        if self._discovered:
+            return
+        self._discovered = True
+
+        for entry_point in _entry_points():
+            if entry_point.name in self._infos:
+                warnings.warn("ignoring solver plugin {!r}, which has the name of an existing solver".format(
+                    entry_point.value))
+                continue
+            self._infos[entry_point.name] = SolverInfo(entry_point.name, entry_point)
+
+    def info(self, name: str) -> SolverInfo:
+        """
+        :raises KeyError: if there is no solver of that name
+        """
+        self._discover()
+        return self._infos[name]
+
+    def infos(self) -> List[SolverInfo]:
+        """
+        :returns: every solver's info, loading the entry points of any plugins not loaded yet for their capabilities
+        """
+        self._discover()
+        for name, info in list(self._infos.items()):
+            if isinstance(info._target, (type, str)):
+                continue
+            try:
+                info._load_entry_point()
+            except Exception as e:
+                warnings.warn("unable to load solver plugin {!r}: {}".format(info._target.value, e))
+                del self._infos[name]
+        return list(self._infos.values())
+
+    def names(self, **capabilities) -> List[str]:
+        """
+        :param capabilities: required capability values, see SolverInfo.matches
+
+        :returns: the names of the solvers with those capabilities, in registration order
+        """
+        return [info.name for info in self.infos() if info.matches(**capabilities)]
+
+    def __getitem__(self, name: str) -> type:
+        return self.info(name).load()
+
+    def __contains__(self, name) -> bool:
+        # Unlike MutableMapping's, which would import the solver
+        self._discover()
+        return name in self._infos
+
+    def __setitem__(self, name: str, solver_cls: type) -> None:
+        self.register(name, solver_cls)
+
+    def __delitem__(self, name: str) -> None:
+        self._discover()
+        del self._infos[name]
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover()
+        return iter(list(self._infos))
+
+    def __len__(self) -> int:
+        self._discover()
+        return len(self._infos)
+
+    def __repr__(self):
+        return "<SolverRegistry %s>" % ", ".join(self)
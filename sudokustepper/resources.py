@@ -2,14 +2,14 @@
 
 # Resource object code
 #
-# Created by: The Resource Compiler for PyQt5 (Qt v5.14.2)
+# Created by: The Resource Compiler for PyQt5 (Qt v5.15.14)
 #
 # WARNING! All changes made in this file will be lost!
 
 from PyQt5 import QtCore
 
 qt_resource_data = b"\
-\x00\x00\x02\x49\
+\x00\x00\x02\xc5\
 \x2f\
 \x2a\x20\x42\x61\x73\x65\x20\x63\x65\x6c\x6c\x20\x73\x74\x79\x6c\
 \x65\x20\x2a\x2f\x0a\x43\x65\x6c\x6c\x57\x69\x64\x67\x65\x74\x20\
@@ -25,29 +25,37 @@ qt_resource_data = b"\
 \x74\x65\x72\x6e\x61\x74\x65\x20\x7b\x0a\x20\x20\x20\x20\x62\x61\
 \x63\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\x20\
 \x23\x65\x30\x65\x30\x65\x30\x3b\x0a\x7d\x0a\x0a\x43\x65\x6c\x6c\
-\x57\x69\x64\x67\x65\x74\x5b\x6c\x6f\x63\x6b\x65\x64\x3d\x22\x74\
-\x72\x75\x65\x22\x5d\x20\x7b\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\
-\x72\x3a\x20\x23\x33\x66\x33\x66\x33\x66\x3b\x0a\x20\x20\x20\x20\
+\x57\x69\x64\x67\x65\x74\x5b\x70\x65\x6e\x63\x69\x6c\x3d\x22\x74\
+\x72\x75\x65\x22\x5d\x20\x7b\x0a\x20\x20\x20\x20\x66\x6f\x6e\x74\
+\x2d\x66\x61\x6d\x69\x6c\x79\x3a\x20\x6d\x6f\x6e\x6f\x73\x70\x61\
+\x63\x65\x3b\x0a\x20\x20\x20\x20\x66\x6f\x6e\x74\x2d\x73\x69\x7a\
+\x65\x3a\x20\x38\x70\x74\x3b\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\
+\x72\x3a\x20\x23\x38\x30\x38\x30\x38\x30\x3b\x0a\x20\x20\x20\x20\
 \x66\x6f\x6e\x74\x2d\x77\x65\x69\x67\x68\x74\x3a\x20\x6e\x6f\x72\
-\x6d\x61\x6c\x3b\x0a\x20\x20\x20\x20\x2f\x2a\x20\x66\x6f\x6e\x74\
-\x2d\x77\x65\x69\x67\x68\x74\x3a\x20\x62\x6f\x6c\x64\x3b\x20\x2a\
-\x2f\x0a\x7d\x0a\x0a\x43\x65\x6c\x6c\x57\x69\x64\x67\x65\x74\x5b\
-\x76\x61\x6c\x69\x64\x3d\x22\x66\x61\x6c\x73\x65\x22\x5d\x20\x7b\
-\x0a\x20\x20\x20\x20\x62\x61\x63\x6b\x67\x72\x6f\x75\x6e\x64\x2d\
-\x63\x6f\x6c\x6f\x72\x3a\x20\x23\x66\x66\x36\x39\x36\x31\x3b\x0a\
-\x20\x20\x20\x20\x62\x6f\x72\x64\x65\x72\x2d\x63\x6f\x6c\x6f\x72\
-\x3a\x20\x72\x65\x64\x3b\x0a\x7d\x0a\x0a\x43\x65\x6c\x6c\x57\x69\
-\x64\x67\x65\x74\x5b\x73\x65\x6c\x65\x63\x74\x65\x64\x3d\x22\x74\
-\x72\x75\x65\x22\x5d\x20\x7b\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\
-\x72\x3a\x20\x23\x30\x30\x30\x30\x30\x30\x3b\x0a\x20\x20\x20\x20\
-\x62\x61\x63\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\
-\x3a\x20\x79\x65\x6c\x6c\x6f\x77\x3b\x0a\x7d\x0a\x0a\x43\x65\x6c\
-\x6c\x57\x69\x64\x67\x65\x74\x5b\x65\x64\x69\x74\x61\x62\x6c\x65\
-\x3d\x22\x74\x72\x75\x65\x22\x5d\x5b\x73\x65\x6c\x65\x63\x74\x65\
-\x64\x3d\x22\x66\x61\x6c\x73\x65\x22\x5d\x3a\x68\x6f\x76\x65\x72\
-\x20\x7b\x0a\x20\x20\x20\x20\x62\x61\x63\x6b\x67\x72\x6f\x75\x6e\
-\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\x20\x6c\x69\x67\x68\x74\x79\x65\
-\x6c\x6c\x6f\x77\x3b\x0a\x7d\x0a\
+\x6d\x61\x6c\x3b\x0a\x7d\x0a\x0a\x43\x65\x6c\x6c\x57\x69\x64\x67\
+\x65\x74\x5b\x6c\x6f\x63\x6b\x65\x64\x3d\x22\x74\x72\x75\x65\x22\
+\x5d\x20\x7b\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\x72\x3a\x20\x23\
+\x33\x66\x33\x66\x33\x66\x3b\x0a\x20\x20\x20\x20\x66\x6f\x6e\x74\
+\x2d\x77\x65\x69\x67\x68\x74\x3a\x20\x6e\x6f\x72\x6d\x61\x6c\x3b\
+\x0a\x20\x20\x20\x20\x2f\x2a\x20\x66\x6f\x6e\x74\x2d\x77\x65\x69\
+\x67\x68\x74\x3a\x20\x62\x6f\x6c\x64\x3b\x20\x2a\x2f\x0a\x7d\x0a\
+\x0a\x43\x65\x6c\x6c\x57\x69\x64\x67\x65\x74\x5b\x76\x61\x6c\x69\
+\x64\x3d\x22\x66\x61\x6c\x73\x65\x22\x5d\x20\x7b\x0a\x20\x20\x20\
+\x20\x62\x61\x63\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\
+\x72\x3a\x20\x23\x66\x66\x36\x39\x36\x31\x3b\x0a\x20\x20\x20\x20\
+\x62\x6f\x72\x64\x65\x72\x2d\x63\x6f\x6c\x6f\x72\x3a\x20\x72\x65\
+\x64\x3b\x0a\x7d\x0a\x0a\x43\x65\x6c\x6c\x57\x69\x64\x67\x65\x74\
+\x5b\x73\x65\x6c\x65\x63\x74\x65\x64\x3d\x22\x74\x72\x75\x65\x22\
+\x5d\x20\x7b\x0a\x20\x20\x20\x20\x63\x6f\x6c\x6f\x72\x3a\x20\x23\
+\x30\x30\x30\x30\x30\x30\x3b\x0a\x20\x20\x20\x20\x62\x61\x63\x6b\
+\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\x6c\x6f\x72\x3a\x20\x79\x65\
+\x6c\x6c\x6f\x77\x3b\x0a\x7d\x0a\x0a\x43\x65\x6c\x6c\x57\x69\x64\
+\x67\x65\x74\x5b\x65\x64\x69\x74\x61\x62\x6c\x65\x3d\x22\x74\x72\
+\x75\x65\x22\x5d\x5b\x73\x65\x6c\x65\x63\x74\x65\x64\x3d\x22\x66\
+\x61\x6c\x73\x65\x22\x5d\x3a\x68\x6f\x76\x65\x72\x20\x7b\x0a\x20\
+\x20\x20\x20\x62\x61\x63\x6b\x67\x72\x6f\x75\x6e\x64\x2d\x63\x6f\
+\x6c\x6f\x72\x3a\x20\x6c\x69\x67\x68\x74\x79\x65\x6c\x6c\x6f\x77\
+\x3b\x0a\x7d\x0a\
 "
 
 qt_resource_name = b"\
@@ -73,7 +81,7 @@ qt_resource_struct_v2 = b"\
 \x00\x00\x00\x00\x00\x02\x00\x00\x00\x01\x00\x00\x00\x02\
 \x00\x00\x00\x00\x00\x00\x00\x00\
 \x00\x00\x00\x12\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\
-\x00\x00\x01\x71\xfe\x93\x9d\x60\
+\x00\x00\x01\xa1\x53\x1d\x07\xce\
 "
 
 qt_version = [int(v) for v in QtCore.qVersion().split('.')]
@@ -1,10 +1,37 @@
 # -*- coding: utf-8 -*-
 
 import itertools
+import random
+import sys
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from copy import deepcopy
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 
-from sudokustepper.grid import Grid
+from sudokustepper import kernels
+from sudokustepper.grid import ALL_CANDIDATES, CELL_UNITS, MASK_DIGITS, MASK_POPCOUNT, PEERS, UNITS, Grid
+from sudokustepper.instrumentation import PROFILERS, SolverStats, approx_size, peak_rss, profiled
+from sudokustepper.registry import SolverRegistry
+from sudokustepper.trace import CompactStepHistory
+
+# What a solver does once it exceeds its memory limit: "compact" replaces the step history with a CompactStepHistory
+# (then stops recording steps if it is still over the limit, or straight away if its internal structures alone are
+# over the limit, which compacting can't help), "stop" stops recording steps straight away
+MEMORY_POLICIES = ("compact", "stop")
+
+# The number of steps between measurements of a solver's internal structures
+MEMORY_CHECK_INTERVAL = 4096
+
+# The number of backtracks before the first restart of a randomised search; each later run is allowed this many times
+# the next term of the Luby sequence
+RESTART_UNIT = 64
+
+# The most nogoods a backjumping search keeps, forgetting the oldest first
+NOGOOD_LIMIT = 10000
+
+# The most placements in a nogood worth learning: larger ones rarely apply again
+NOGOOD_MAX_SIZE = 8
 
 
 class SolverDelegate:
@@ -16,6 +43,22 @@ class SolverDelegate:
         """
         pass
 
+    def on_solver_stats(self, stats: SolverStats):
+        """
+        Called once the solver has finished, before on_solver_solved or on_solver_failed.
+
+        :param stats: the counters and timings collected during the solve
+        """
+        pass
+
+    def on_solver_memory_limit(self, action: str):
+        """
+        Called if the solver exceeds its memory limit.
+
+        :param action: what the solver did to reduce its memory use, one of MEMORY_POLICIES
+        """
+        pass
+
     def on_solver_solved(self):
         """
         Called if the solver finds a solution to the puzzle.
@@ -29,19 +72,165 @@ class SolverDelegate:
         pass
 
 
+class _Cancelled(Exception):
+    pass
+
+
+class _Restart(Exception):
+    pass
+
+
+def luby(i: int) -> int:
+    """
+    :param i: the position in the sequence, starting from 1
+    :returns: the i-th term of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
 class Solver(ABC):
-    def __init__(self, grid: Grid, delegate=None):
+    # False if the solver may give up on puzzles which have a solution
+    complete: bool = True
+
+    # Capabilities, as listed in the solver registry (see sudokustepper.registry.SolverInfo)
+    traceable: bool = True
+    supports_budgets: bool = True
+    parallel: bool = False
+    grid_sizes: Tuple[int, ...] = (9,)
+    slow: bool = False
+
+    # Attributes growing with every step, which _structures_size leaves out of its walk: subclasses add up their size as
+    # they grow instead, so that measuring doesn't take longer the longer the solve
+    _sized_as_added: Tuple[str, ...] = ()
+
+    def __init__(self, grid: Grid, delegate=None, profile: Optional[str] = None, record_steps: bool = True,
+                 memory_limit: Optional[int] = None, memory_policy: str = "compact"):
+        """
+        :param grid: the grid to solve, which is modified in place
+        :param delegate: an optional SolverDelegate notified of the solver's progress
+        :param profile: one of PROFILERS (sudokustepper.instrumentation), e.g. "cprofile", to profile the solve,
+                        storing the report in stats.profile_report
+        :param record_steps: set to False to skip recording a copy of the grid in step_history for every step
+        :param memory_limit: the approximate memory, in bytes, that the step history and the solver's internal
+                             structures may use before memory_policy is applied, or None for no limit
+        :param memory_policy: one of MEMORY_POLICIES
+        """
+        if memory_policy not in MEMORY_POLICIES:
+            raise ValueError("memory_policy must be one of {}".format(", ".join(MEMORY_POLICIES)))
+        if profile is not None and profile not in PROFILERS:
+            raise ValueError("profile must be one of {}".format(", ".join(PROFILERS)))
+
         self.grid: Grid = grid
+        # A list of Grids, or a CompactStepHistory once compacted
         self.step_history = []
         self.delegate: SolverDelegate = delegate
+        self.profile: Optional[str] = profile
+        self.record_steps: bool = record_steps
+        self.memory_limit: Optional[int] = memory_limit
+        self.memory_policy: str = memory_policy
+        self.stats = SolverStats()
+        # True if the solve was stopped by cancel()
+        self.cancelled: bool = False
+        self._cancel_requested: bool = False
+        # The same request, as a buffer which the compiled kernels check while they run
+        self._cancel_buffer = bytearray(1)
+
+        self._step_bytes = 0
+        self._history_bytes = 0
+        self._structures_bytes = 0
+
+    def cancel(self):
+        """
+        Asks the solver to stop at its next step, after which solve() returns False. May be called from any thread.
+        """
+        self._cancel_requested = True
+        self._cancel_buffer[0] = 1
 
     def _step_complete(self):
-        self.step_history.append(deepcopy(self.grid))
+        if self._cancel_requested:
+            raise _Cancelled()
+
+        stats = self.stats
+        stats.steps += 1
+        if self.record_steps:
+            history = self.step_history
+            if isinstance(history, list):
+                history.append(deepcopy(self.grid))
+                # Every copy of the grid is the same size, so only measure the first
+                if not self._step_bytes:
+                    self._step_bytes = approx_size(history[-1])
+                self._history_bytes += self._step_bytes
+            else:
+                history.append(self.grid)
+                self._history_bytes = history.nbytes
+
+        if stats.steps % MEMORY_CHECK_INTERVAL == 0:
+            self._structures_bytes = self._structures_size()
+        self._check_memory()
 
         if self.delegate is not None:
             grid_copy = deepcopy(self.grid)
             self.delegate.on_solver_step_complete(grid_copy)
 
+    def _structures_size(self) -> int:
+        """
+        :returns: the approximate memory used by the solver's internal structures, in bytes
+        """
+        exclude = ("grid", "step_history", "delegate", "stats") + self._sized_as_added
+        return approx_size([value for name, value in vars(self).items() if name not in exclude])
+
+    def _compact(self) -> None:
+        """
+        Called when the step history is compacted under the "compact" memory policy, for subclasses to compact whatever
+        else they keep for every step.
+        """
+
+    def _check_memory(self):
+        used = self._history_bytes + self._structures_bytes
+        if used > self.stats.peak_memory:
+            self.stats.peak_memory = used
+        if self.memory_limit is None or used <= self.memory_limit or not self.record_steps:
+            return
+
+        # The structures, e.g. learnt nogoods or deductions, don't shrink when the history is compacted, so compacting
+        # can't help if they alone are over the limit. They are measured afresh, as they may have grown since last time
+        self._structures_bytes = self._structures_size()
+        if self.memory_policy == "compact" and isinstance(self.step_history, list) and \
+                self._structures_bytes < self.memory_limit:
+            history = CompactStepHistory(self.grid)
+            history.extend(self.step_history)
+            self.step_history = history
+            self._history_bytes = history.nbytes
+            self._compact()
+            self._structures_bytes = self._structures_size()
+            action = "compact"
+        else:
+            self.record_steps = False
+            action = "stop"
+
+        self.stats.memory_limit_action = action
+        if self.delegate is not None:
+            self.delegate.on_solver_memory_limit(action)
+
+    def _possible_values_for_cell(self, x: int, y: int) -> set:
+        self.stats.candidate_lookups += 1
+        return self.grid.possible_values_for_cell(x, y)
+
+    def _grid_valid(self) -> bool:
+        self.stats.validations += 1
+        return self.grid.valid
+
+    def _grid_solved(self) -> bool:
+        self.stats.validations += 1
+        return self.grid.solved
+
+    def _phase(self, name: str):
+        return self.stats.phase(name)
+
     def _solved(self):
         if self.delegate is not None:
             self.delegate.on_solver_solved()
@@ -54,10 +243,50 @@ class Solver(ABC):
     def num_steps(self):
         return len(self.step_history)
 
-    @abstractmethod
+    def step_description(self, step: int) -> Optional[str]:
+        """
+        :param step: the step number, starting from 1
+        :returns: a description of what happened in the step, if the solver provides one
+        """
+        return None
+
     def solve(self) -> bool:
         """
-        Attempts to find a solution for the Sudoku grid.
+        Attempts to find a solution for the Sudoku grid. If the solve is cancelled, the delegate is only sent the stats.
+
+        :returns: True if a solution has been found, otherwise False.
+        """
+        stats = self.stats
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            with profiled(stats, self.profile):
+                success = self._solve()
+        except _Cancelled:
+            success = False
+            self.cancelled = True
+        stats.wall_time = time.perf_counter() - wall_start
+        stats.cpu_time = time.thread_time() - cpu_start
+
+        self._structures_bytes = self._structures_size()
+        self._check_memory()
+        stats.history_bytes = self._history_bytes
+        stats.peak_rss = peak_rss()
+
+        if self.delegate is not None:
+            self.delegate.on_solver_stats(stats)
+
+        if success:
+            self._solved()
+        elif not self.cancelled:
+            self._failed()
+
+        return success
+
+    @abstractmethod
+    def _solve(self) -> bool:
+        """
+        Runs the solving algorithm. Implemented by each solver.
 
         :returns: True if a solution has been found, otherwise False.
         """
@@ -65,66 +294,818 @@ class Solver(ABC):
 
 
 class NaiveSolver(Solver):
-    def solve(self):
-        success = False
+    # Tries every combination of candidates, which takes exponential time on ordinary puzzles
+    slow = True
 
+    def _solve(self):
         # Initialisation
-        empty_cell_coords = self.grid.empty_cell_coords()
-        all_possible_cell_values = []
-        for (x, y) in empty_cell_coords:
-            possible_values = self.grid.possible_values_for_cell(x, y)
-            all_possible_cell_values.append(possible_values)
+        with self._phase("setup"):
+            empty_cell_coords = self.grid.empty_cell_coords()
+            all_possible_cell_values = []
+            for (x, y) in empty_cell_coords:
+                possible_values = self._possible_values_for_cell(x, y)
+                all_possible_cell_values.append(possible_values)
 
         # Solving
-        for values_to_try in itertools.product(*all_possible_cell_values):
-            for i, (x, y) in enumerate(empty_cell_coords):
-                self.grid.cells[y][x].value = values_to_try[i]
+        with self._phase("search"):
+            for values_to_try in itertools.product(*all_possible_cell_values):
+                for i, (x, y) in enumerate(empty_cell_coords):
+                    self.grid.cells[y][x].value = values_to_try[i]
 
-            if self.grid.valid:
-                success = True
-                break
+                if self._grid_valid():
+                    return True
 
-            self._step_complete()
+                self._step_complete()
 
-        if success:
-            self._solved()
+        return False
+
+
+class BacktracingSolver(Solver):
+    """
+    Depth-first search, trying the first empty cell and its possible values in order.
+
+    Given a seed, the order is randomised instead: the most constrained cell is tried first, with ties broken at random,
+    and its values are tried in a random order. Each run of the search is cut off after restart_unit times the next term
+    of the Luby sequence backtracks, and the search starts again from the puzzle in a new order. This avoids the very
+    long runs an unlucky order can take, while the growing budgets keep the search complete. The same seed always gives
+    the same steps.
+
+    With backjumping, the search tries the most constrained cell first, and records which placed cells ruled out each
+    value. A dead end jumps straight back to the latest of the cells responsible for it, undoing the cells in between,
+    rather than to the previous cell. The placements responsible for each dead end are learnt as a nogood, so that the
+    search never repeats them. Backtracks and backjumps are steps of their own, with descriptions.
+    """
+
+    _sized_as_added = ("_descriptions", "_description_copies", "_nogoods", "_nogood_index")
+
+    def __init__(self, grid: Grid, delegate=None, profile: Optional[str] = None, record_steps: bool = True,
+                 memory_limit: Optional[int] = None, memory_policy: str = "compact", seed: Optional[int] = None,
+                 restart_unit: Optional[int] = RESTART_UNIT, backjumping: bool = False,
+                 nogood_limit: int = NOGOOD_LIMIT):
+        """
+        :param seed: the seed for a randomised search, or None to search in order
+        :param restart_unit: the backtracks allowed in the first run of a randomised search, or None to never restart
+        :param backjumping: set to True for conflict-directed backjumping
+        :param nogood_limit: the most nogoods a backjumping search keeps, or 0 to learn none
+        """
+        super().__init__(grid, delegate, profile, record_steps, memory_limit, memory_policy)
+        self.seed: Optional[int] = seed
+        self.restart_unit: Optional[int] = restart_unit
+        self.backjumping: bool = backjumping
+        self.nogood_limit: int = nogood_limit
+        self._rng: Optional[random.Random] = None
+        # The total backtracks at which the current run is cut off
+        self._backtrack_limit: Optional[int] = None
+
+        # Backjumping state: the depth at which each cell was placed by the search (-1 for clues and empty cells), the
+        # dead end being jumped back from and the number of cells jumped past so far, and the description of each step
+        self._levels: List[int] = [-1] * 81
+        self._dead_end: int = 0
+        self._jumped: int = 0
+        self._descriptions: List[str] = []
+        # Once the step history is compacted, the one copy of each description kept, since most descriptions repeat
+        self._description_copies: Optional[Dict[str, str]] = None
+        # Learnt nogoods, oldest first, each a set of placements (9 * cell index + digit - 1), and the nogoods
+        # containing each placement
+        self._nogoods: "OrderedDict[FrozenSet[int], None]" = OrderedDict()
+        self._nogood_index: Dict[int, Set[FrozenSet[int]]] = {}
+        # The size of the descriptions and of the nogoods, kept up to date as they are added and removed
+        self._descriptions_bytes = 0
+        self._nogoods_bytes = 0
+
+    def step_description(self, step: int) -> Optional[str]:
+        return self._descriptions[step - 1] if 0 < step <= len(self._descriptions) else None
+
+    def _step(self, description: str):
+        if self.backjumping and self.record_steps:
+            copies = self._description_copies
+            if copies is None:
+                self._descriptions_bytes += sys.getsizeof(description)
+            elif description in copies:
+                description = copies[description]
+            else:
+                copies[description] = description
+                self._descriptions_bytes += sys.getsizeof(description)
+            self._descriptions.append(description)
+        self._step_complete()
+
+    def _compact(self):
+        copies = {}
+        self._descriptions = [copies.setdefault(description, description) for description in self._descriptions]
+        self._description_copies = copies
+        self._descriptions_bytes = sum(sys.getsizeof(description) for description in copies)
+
+    def _structures_size(self) -> int:
+        size = super()._structures_size() + self._descriptions_bytes + self._nogoods_bytes
+        # The containers themselves, without the contents counted above
+        for container in (self._descriptions, self._description_copies, self._nogoods, self._nogood_index):
+            if container is not None:
+                size += sys.getsizeof(container)
+        return size + sum(sys.getsizeof(nogoods) for nogoods in self._nogood_index.values())
+
+    def _solve(self):
+        if self.backjumping:
+            search = self._backjumping_search
+        elif self.seed is None:
+            search = self._search
         else:
-            self._failed()
+            search = self._randomised_search
 
-        return success
+        if self.seed is None:
+            with self._phase("search"):
+                if search == self._search:
+                    solved = self._native_search()
+                    if solved is not None:
+                        return solved
+                return search()
 
+        self._rng = random.Random(self.seed)
+        empty_cells = [cell for cell in self.grid.flattened() if cell.empty]
+        with self._phase("search"):
+            for run in itertools.count(1):
+                if self.restart_unit is not None:
+                    self._backtrack_limit = self.stats.backtracks + self.restart_unit * luby(run)
+                try:
+                    return search()
+                except _Restart:
+                    pass
 
-class BacktracingSolver(Solver):
-    def solve(self):
+                for cell in empty_cells:
+                    cell.value = 0
+                self.stats.restarts += 1
+                # The cleared grid is a step of its own, so that restarts show up in the step history
+                self._step("Restart {}".format(self.stats.restarts))
+
+    def _search(self):
         # Find the next empty cell
         empty_cell_coords = self.grid.empty_cell_coords()
         if not empty_cell_coords:
-            self._failed()
             return False
 
         x, y = empty_cell_coords[0]
-        for possible_value in self.grid.possible_values_for_cell(x, y):
+        # In ascending order, as the compiled search kernel tries them
+        for possible_value in sorted(self._possible_values_for_cell(x, y)):
             self.grid.cells[y][x].value = possible_value
 
             self._step_complete()
 
-            if self.grid.solved:
-                self._solved()
+            if self._grid_solved():
                 return True
             else:
-                if self.solve():
+                if self._search():
                     return True
 
         self.grid.cells[y][x].value = 0
+        self.stats.backtracks += 1
+        return False
+
+    def _native_search(self) -> Optional[bool]:
+        """
+        Runs the in-order search with the compiled search kernel, which visits the same nodes as _search, if the
+        kernels are available and the steps aren't needed.
+
+        :returns: True if a solution was found, False if not, or None if the compiled kernel can't be used
+        """
+        grid = self.grid
+        if not kernels.NATIVE or self.record_steps or self.delegate is not None:
+            return None
+        # _search gives up on full grids, and invalid grids would be "solved" by the kernel
+        if not grid.valid or not grid.empty_cell_coords():
+            return None
+
+        result = kernels.search(grid.values, 1, self._cancel_buffer)
+        if result is None:
+            raise _Cancelled()
+
+        solution, _, nodes, backtracks = result
+        # The counters _search would have reached
+        stats = self.stats
+        stats.steps += nodes
+        stats.backtracks += backtracks
+        stats.validations += nodes
+        stats.candidate_lookups += nodes + (0 if solution is not None else 1)
+        if solution is None:
+            return False
+
+        for cell, value in zip(grid.flattened(), solution):
+            if cell.empty:
+                cell.value = value
+        return True
+
+    def _choose_cell(self) -> Tuple[Optional[int], int]:
+        """
+        :returns: the index of the empty cell with the fewest candidates, with ties broken at random if the search is
+                  randomised, and its candidate mask; or (None, 0) if the grid is full
+        """
+        rng = self._rng
+        choice = None
+        choice_mask = 0
+        fewest = 10
+        ties = 0
+        masks = self.grid.candidate_masks()
+        for i, cell in enumerate(self.grid.flattened()):
+            if not cell.empty:
+                continue
+            self.stats.candidate_lookups += 1
+            mask = masks[i]
+            num_candidates = MASK_POPCOUNT[mask]
+            if num_candidates < fewest:
+                choice = i
+                choice_mask = mask
+                fewest = num_candidates
+                ties = 1
+                if fewest <= 1 and rng is None:
+                    break
+            elif num_candidates == fewest and rng is not None:
+                # Pick uniformly among the tied cells seen so far
+                ties += 1
+                if rng.randrange(ties) == 0:
+                    choice = i
+                    choice_mask = mask
+        return choice, choice_mask
+
+    def _check_restart(self):
+        if self._backtrack_limit is not None and self.stats.backtracks >= self._backtrack_limit:
+            raise _Restart()
+
+    def _randomised_search(self):
+        i, mask = self._choose_cell()
+        if i is None:
+            return False
+
+        cell = self.grid.cells[i // 9][i % 9]
+        values = list(MASK_DIGITS[mask])
+        self._rng.shuffle(values)
+        for possible_value in values:
+            cell.value = possible_value
+
+            self._step_complete()
+
+            if self._grid_solved() or self._randomised_search():
+                return True
+
+        cell.value = 0
+        self.stats.backtracks += 1
+        self._check_restart()
         return False
 
+    def _backjumping_search(self) -> bool:
+        if not self._grid_valid():
+            return False
+        self._levels = [-1] * 81
+        return self._backjump(0) is None
+
+    def _culprit(self, i: int, digit: int) -> Optional[int]:
+        """
+        :returns: the earliest placed peer of cell i holding the digit, or None if a clue holds it
+        """
+        cells = self.grid.flattened()
+        levels = self._levels
+        culprit = None
+        for k in PEERS[i]:
+            if cells[k].value == digit:
+                if levels[k] < 0:
+                    return None
+                if culprit is None or levels[k] < levels[culprit]:
+                    culprit = k
+        return culprit
+
+    def _backjump(self, depth: int) -> Optional[Set[int]]:
+        """
+        :param depth: the number of cells placed by the search so far
+
+        :returns: None once the grid is solved, otherwise the conflict set: the placed cells which ruled out every value
+                  in this branch
+        """
+        i, mask = self._choose_cell()
+        if i is None:
+            return None if self._grid_solved() else set()
+
+        cell = self.grid.cells[i // 9][i % 9]
+        conflicts = set()
+        for digit in MASK_DIGITS[ALL_CANDIDATES & ~mask]:
+            culprit = self._culprit(i, digit)
+            if culprit is not None:
+                conflicts.add(culprit)
+
+        values = list(MASK_DIGITS[mask])
+        if self._rng is not None:
+            self._rng.shuffle(values)
+        for value in values:
+            reasons = self._nogood_reasons(i, value)
+            if reasons is not None:
+                conflicts |= reasons
+                continue
+
+            cell.value = value
+            self._levels[i] = depth
+            self._step("{} = {}".format(_cell_name(i), value))
+
+            child_conflicts = self._backjump(depth + 1)
+            if child_conflicts is None:
+                return None
+
+            cell.value = 0
+            self._levels[i] = -1
+            if i not in child_conflicts:
+                # The dead end doesn't depend on this cell, so jump straight past it
+                self._jumped += 1
+                return child_conflicts
+
+            child_conflicts.discard(i)
+            conflicts |= child_conflicts
+            if self._jumped:
+                self.stats.backjumps += 1
+                self._step("Dead end at {}: backjump to {}, past {} cell{}".format(
+                    _cell_name(self._dead_end), _cell_name(i), self._jumped, "" if self._jumped == 1 else "s"))
+            else:
+                self._step("Dead end at {}: backtrack to {}".format(_cell_name(self._dead_end), _cell_name(i)))
+
+        self.stats.backtracks += 1
+        self._dead_end = i
+        self._jumped = 0
+        self._learn(conflicts)
+        self._check_restart()
+        return conflicts
+
+    def _learn(self, conflicts: Set[int]):
+        """
+        Learns the current values of the cells in a conflict set as a nogood, if it is small enough to be worth keeping.
+        """
+        if not self.nogood_limit or not 0 < len(conflicts) <= NOGOOD_MAX_SIZE:
+            return
+
+        cells = self.grid.flattened()
+        nogood = frozenset(9 * k + cells[k].value - 1 for k in conflicts)
+        if nogood in self._nogoods:
+            return
+        self._nogoods[nogood] = None
+        self._nogoods_bytes += approx_size(nogood)
+        for placement in nogood:
+            self._nogood_index.setdefault(placement, set()).add(nogood)
+
+        if len(self._nogoods) > self.nogood_limit:
+            oldest = self._nogoods.popitem(last=False)[0]
+            self._nogoods_bytes -= approx_size(oldest)
+            for placement in oldest:
+                self._nogood_index[placement].discard(oldest)
 
-ALL_SOLVERS = {
-    "naive": NaiveSolver,
-    "backtracing": BacktracingSolver
+    def _nogood_reasons(self, i: int, value: int) -> Optional[Set[int]]:
+        """
+        :returns: the cells of a learnt nogood which rules out placing the value in cell i, or None if none does
+        """
+        placement = 9 * i + value - 1
+        nogoods = self._nogood_index.get(placement)
+        if not nogoods:
+            return None
+
+        cells = self.grid.flattened()
+        for nogood in nogoods:
+            if all(cells[p // 9].value == p % 9 + 1 for p in nogood if p != placement):
+                return {p // 9 for p in nogood if p != placement}
+        return None
+
+
+class RandomisedBacktracingSolver(BacktracingSolver):
+    """
+    A BacktracingSolver using a randomised search with restarts, seeded with 0 unless given another seed.
+    """
+
+    def __init__(self, grid: Grid, delegate=None, profile: Optional[str] = None, record_steps: bool = True,
+                 memory_limit: Optional[int] = None, memory_policy: str = "compact", seed: int = 0,
+                 restart_unit: Optional[int] = RESTART_UNIT):
+        super().__init__(grid, delegate, profile, record_steps, memory_limit, memory_policy, seed, restart_unit)
+
+
+class BackjumpingSolver(BacktracingSolver):
+    """
+    A BacktracingSolver using conflict-directed backjumping and nogood learning.
+    """
+
+    def __init__(self, grid: Grid, delegate=None, profile: Optional[str] = None, record_steps: bool = True,
+                 memory_limit: Optional[int] = None, memory_policy: str = "compact", seed: Optional[int] = None,
+                 restart_unit: Optional[int] = RESTART_UNIT, nogood_limit: int = NOGOOD_LIMIT):
+        super().__init__(grid, delegate, profile, record_steps, memory_limit, memory_policy, seed, restart_unit,
+                         backjumping=True, nogood_limit=nogood_limit)
+
+
+# Human solving techniques, in order of increasing cost, and the difficulty grade a puzzle needing each one receives
+TECHNIQUES = (
+    "naked single",
+    "hidden single",
+    "pointing",
+    "claiming",
+    "naked pair",
+    "hidden pair",
+    "naked triple",
+    "hidden triple",
+    "x-wing",
+    "swordfish",
+)
+GRADES = ("easy", "medium", "hard", "expert")
+TECHNIQUE_GRADES = {
+    "naked single": "easy",
+    "hidden single": "easy",
+    "pointing": "medium",
+    "claiming": "medium",
+    "naked pair": "medium",
+    "hidden pair": "hard",
+    "naked triple": "hard",
+    "hidden triple": "hard",
+    "x-wing": "expert",
+    "swordfish": "expert",
 }
 
 
+def _cell_name(i: int) -> str:
+    return "r{}c{}".format(i // 9 + 1, i % 9 + 1)
+
+
+def _unit_name(u: int) -> str:
+    if u < 9:
+        return "row {}".format(u + 1)
+    if u < 18:
+        return "column {}".format(u - 8)
+    return "box {}".format(u - 17)
+
+
+class Deduction:
+    """
+    A single logical step: the technique used, and the values placed or candidates eliminated as a result.
+    """
+
+    def __init__(self, technique: str, placements: List[Tuple[int, int]] = None,
+                 eliminations: List[Tuple[int, int]] = None, reason: str = ""):
+        """
+        :param technique: one of TECHNIQUES
+        :param placements: (cell index, digit) pairs
+        :param eliminations: (cell index, digit) pairs
+        :param reason: a short description of where the technique applies
+        """
+        self.technique = technique
+        self.placements = placements or []
+        self.eliminations = eliminations or []
+        self.reason = reason
+
+    def __str__(self):
+        parts = ["{}={}".format(_cell_name(i), d) for i, d in self.placements]
+        parts += ["{}<>{}".format(_cell_name(i), d) for i, d in self.eliminations]
+        s = "{}: {}".format(self.technique.capitalize(), ", ".join(parts))
+        if self.reason:
+            s += " ({})".format(self.reason)
+        return s
+
+    def __repr__(self):
+        return "<Deduction %s>" % self
+
+
+class LogicalSolver(Solver):
+    """
+    Solves the grid the way a person would, tracking pencil-mark candidates as bitmasks and applying the techniques in
+    TECHNIQUES, cheapest first. Every deduction is a step, so eliminations appear in the step history as well as
+    placements. The puzzle is graded by the hardest technique needed, or left ungraded if the techniques run out.
+    """
+
+    complete = False
+
+    _sized_as_added = ("deductions",)
+
+    def __init__(self, grid: Grid, delegate=None, profile: Optional[str] = None, record_steps: bool = True,
+                 memory_limit: Optional[int] = None, memory_policy: str = "compact"):
+        super().__init__(grid, delegate, profile, record_steps, memory_limit, memory_policy)
+        self.candidates: List[int] = [0] * 81
+        self.deductions: List[Deduction] = []
+        self._deductions_bytes = 0
+        self.technique_counts: Dict[str, int] = {}
+        self.grade: Optional[str] = None
+
+    def step_description(self, step: int) -> Optional[str]:
+        return str(self.deductions[step - 1]) if 0 < step <= len(self.deductions) else None
+
+    def _structures_size(self) -> int:
+        return super()._structures_size() + sys.getsizeof(self.deductions) + self._deductions_bytes
+
+    def _solve(self):
+        if not self._grid_valid():
+            return False
+
+        with self._phase("setup"):
+            cells = self.grid.flattened()
+            masks = self.grid.candidate_masks()
+            for i, cell in enumerate(cells):
+                if cell.empty:
+                    self.stats.candidate_lookups += 1
+                    self.candidates[i] = masks[i]
+
+        with self._phase("search"):
+            techniques = [getattr(self, "_find_" + t.replace(" ", "_").replace("-", "_")) for t in TECHNIQUES]
+            while any(cell.empty for cell in cells):
+                # An empty cell without candidates means the puzzle has no solution
+                if any(cell.empty and self.candidates[i] == 0 for i, cell in enumerate(cells)):
+                    return False
+
+                for find in techniques:
+                    deduction = find()
+                    if deduction is not None:
+                        break
+                else:
+                    return False
+
+                self._apply(deduction)
+
+        hardest = max((GRADES.index(TECHNIQUE_GRADES[t]) for t in self.technique_counts), default=0)
+        self.grade = GRADES[hardest]
+        return self._grid_solved()
+
+    def _apply(self, deduction: Deduction) -> None:
+        cells = self.grid.flattened()
+        candidates = self.candidates
+        for i, d in deduction.placements:
+            cells[i].value = d
+            candidates[i] = 0
+            bit = ~(1 << (d - 1))
+            for k in PEERS[i]:
+                candidates[k] &= bit
+        for i, d in deduction.eliminations:
+            candidates[i] &= ~(1 << (d - 1))
+
+        self.deductions.append(deduction)
+        self._deductions_bytes += approx_size(deduction)
+        self.technique_counts[deduction.technique] = self.technique_counts.get(deduction.technique, 0) + 1
+        self._step_complete()
+
+    def _eliminations(self, cell_indices, mask: int) -> List[Tuple[int, int]]:
+        candidates = self.candidates
+        return [(i, d) for i in cell_indices for d in MASK_DIGITS[candidates[i] & mask]]
+
+    def _positions(self, unit: int, d: int) -> List[int]:
+        bit = 1 << (d - 1)
+        candidates = self.candidates
+        return [i for i in UNITS[unit] if candidates[i] & bit]
+
+    def _find_naked_single(self) -> Optional[Deduction]:
+        for i, mask in enumerate(self.candidates):
+            if MASK_POPCOUNT[mask] == 1:
+                return Deduction("naked single", placements=[(i, MASK_DIGITS[mask][0])])
+        return None
+
+    def _find_hidden_single(self) -> Optional[Deduction]:
+        for u in range(27):
+            for d in range(1, 10):
+                positions = self._positions(u, d)
+                if len(positions) == 1:
+                    return Deduction("hidden single", placements=[(positions[0], d)], reason=_unit_name(u))
+        return None
+
+    def _find_pointing(self) -> Optional[Deduction]:
+        # A digit confined to one line within a box can be removed from the rest of that line
+        for box in range(18, 27):
+            for d in range(1, 10):
+                positions = self._positions(box, d)
+                if len(positions) < 2:
+                    continue
+                for line_type in (0, 1):
+                    lines = {CELL_UNITS[i][line_type] for i in positions}
+                    if len(lines) == 1:
+                        line = lines.pop()
+                        others = [i for i in UNITS[line] if CELL_UNITS[i][2] != box]
+                        eliminations = self._eliminations(others, 1 << (d - 1))
+                        if eliminations:
+                            return Deduction("pointing", eliminations=eliminations,
+                                             reason="{} in {}".format(d, _unit_name(box)))
+        return None
+
+    def _find_claiming(self) -> Optional[Deduction]:
+        # A digit confined to one box within a line can be removed from the rest of that box
+        for line in range(18):
+            for d in range(1, 10):
+                positions = self._positions(line, d)
+                if len(positions) < 2:
+                    continue
+                boxes = {CELL_UNITS[i][2] for i in positions}
+                if len(boxes) == 1:
+                    box = boxes.pop()
+                    others = [i for i in UNITS[box] if i not in UNITS[line]]
+                    eliminations = self._eliminations(others, 1 << (d - 1))
+                    if eliminations:
+                        return Deduction("claiming", eliminations=eliminations,
+                                         reason="{} in {}".format(d, _unit_name(line)))
+        return None
+
+    def _find_naked_subset(self, size: int, technique: str) -> Optional[Deduction]:
+        # N cells in a unit with only N candidates between them; those candidates can be removed from the rest of it
+        candidates = self.candidates
+        for u in range(27):
+            unit_cells = [i for i in UNITS[u] if 2 <= MASK_POPCOUNT[candidates[i]] <= size]
+            for subset in itertools.combinations(unit_cells, size):
+                mask = 0
+                for i in subset:
+                    mask |= candidates[i]
+                if MASK_POPCOUNT[mask] != size:
+                    continue
+                others = [i for i in UNITS[u] if i not in subset]
+                eliminations = self._eliminations(others, mask)
+                if eliminations:
+                    return Deduction(technique, eliminations=eliminations, reason="{} in {}".format(
+                        "".join(str(d) for d in MASK_DIGITS[mask]), _unit_name(u)))
+        return None
+
+    def _find_hidden_subset(self, size: int, technique: str) -> Optional[Deduction]:
+        # N digits confined to the same N cells of a unit; other candidates can be removed from those cells
+        for u in range(27):
+            digit_positions = {}
+            for d in range(1, 10):
+                positions = self._positions(u, d)
+                if 2 <= len(positions) <= size:
+                    digit_positions[d] = positions
+            for digits in itertools.combinations(digit_positions, size):
+                cell_indices = set()
+                for d in digits:
+                    cell_indices.update(digit_positions[d])
+                if len(cell_indices) != size:
+                    continue
+                mask = 0
+                for d in digits:
+                    mask |= 1 << (d - 1)
+                eliminations = self._eliminations(sorted(cell_indices), ALL_CANDIDATES & ~mask)
+                if eliminations:
+                    return Deduction(technique, eliminations=eliminations, reason="{} in {}".format(
+                        "".join(str(d) for d in digits), _unit_name(u)))
+        return None
+
+    def _find_fish(self, size: int, technique: str) -> Optional[Deduction]:
+        # A digit confined to the same N columns in N rows can be removed from the rest of those columns (and the
+        # same with rows and columns swapped)
+        # Rows (units 0-8) covered by columns, then columns (units 9-17) covered by rows, each identified by its index
+        # in CELL_UNITS
+        for base_start, cover_type in ((0, 1), (9, 0)):
+            for d in range(1, 10):
+                base_covers = {}
+                for base in range(base_start, base_start + 9):
+                    positions = self._positions(base, d)
+                    if 2 <= len(positions) <= size:
+                        base_covers[base] = {CELL_UNITS[i][cover_type] for i in positions}
+                for bases in itertools.combinations(base_covers, size):
+                    covers = set()
+                    for base in bases:
+                        covers.update(base_covers[base])
+                    if len(covers) != size:
+                        continue
+                    others = [i for cover in sorted(covers) for i in UNITS[cover]
+                              if CELL_UNITS[i][1 - cover_type] not in bases]
+                    eliminations = self._eliminations(others, 1 << (d - 1))
+                    if eliminations:
+                        return Deduction(technique, eliminations=eliminations, reason="{} in {}".format(
+                            d, ", ".join(_unit_name(base) for base in bases)))
+        return None
+
+    def _find_naked_pair(self):
+        return self._find_naked_subset(2, "naked pair")
+
+    def _find_hidden_pair(self):
+        return self._find_hidden_subset(2, "hidden pair")
+
+    def _find_naked_triple(self):
+        return self._find_naked_subset(3, "naked triple")
+
+    def _find_hidden_triple(self):
+        return self._find_hidden_subset(3, "hidden triple")
+
+    def _find_x_wing(self):
+        return self._find_fish(2, "x-wing")
+
+    def _find_swordfish(self):
+        return self._find_fish(3, "swordfish")
+
+
+# Bitboards have one bit per cell, with bit i set for the cell at index i (see sudokustepper.grid)
+# For each cell, a bitboard of the cell itself and its 20 peers
+_PEER_BOARDS = tuple((1 << i) | sum(1 << k for k in PEERS[i]) for i in range(81))
+
+
+class BitboardSolver(Solver):
+    """
+    Backtracking solver which represents the whole grid as bitboards: one 81-bit integer per digit marking the cells
+    where that digit is still a candidate. Placing a value, eliminating it from all peers and detecting dead ends each
+    take a handful of big-integer operations, without touching any Cell objects. The grid is only updated for recorded
+    steps, and with the final solution.
+
+    The most constrained cell is tried first: a cell with a single candidate if there is one, otherwise a cell with two,
+    otherwise the first empty cell.
+    """
+
+    def __init__(self, grid: Grid, delegate=None, profile: Optional[str] = None, record_steps: bool = True,
+                 memory_limit: Optional[int] = None, memory_policy: str = "compact"):
+        super().__init__(grid, delegate, profile, record_steps, memory_limit, memory_policy)
+        # True if the grid is updated for every step, for the step history or the delegate
+        self._trace: bool = record_steps or delegate is not None
+
+    def _solve(self):
+        if not self._grid_valid():
+            return False
+
+        with self._phase("setup"):
+            # Start with every empty cell as a candidate for every digit, then place the existing values
+            empty = 0
+            for i, cell in enumerate(self.grid.flattened()):
+                if cell.empty:
+                    empty |= 1 << i
+            candidates = [empty] * 9
+            for i, cell in enumerate(self.grid.flattened()):
+                if not cell.empty:
+                    candidates[cell.value - 1] &= ~_PEER_BOARDS[i]
+
+        with self._phase("search"):
+            solution = self._search(candidates, empty)
+
+        if solution is None:
+            return False
+
+        cells = self.grid.flattened()
+        for d, board in enumerate(solution, 1):
+            while board:
+                bit = board & -board
+                cells[bit.bit_length() - 1].value = d
+                board ^= bit
+        return self._grid_solved()
+
+    def _search(self, candidates: List[int], empty: int, placed: List[int] = None) -> Optional[List[int]]:
+        """
+        :param candidates: for each digit, the empty cells where it is a candidate
+        :param empty: the empty cells
+        :param placed: for each digit, the cells where it has been placed by the search
+
+        :returns: the placed cells for each digit once the grid is full, or None if this branch has no solution
+        """
+        if placed is None:
+            placed = [0] * 9
+        if not empty:
+            return placed
+
+        # Bit-sliced counting of candidates per cell: cells with at least one, two and three candidates
+        at_least_one = at_least_two = at_least_three = 0
+        for board in candidates:
+            at_least_three |= at_least_two & board
+            at_least_two |= at_least_one & board
+            at_least_one |= board
+
+        self.stats.candidate_lookups += 1
+        if empty & ~at_least_one:
+            # An empty cell has no candidates left
+            return None
+
+        choices = at_least_one & ~at_least_two
+        if not choices:
+            choices = at_least_two & ~at_least_three
+            if not choices:
+                choices = empty
+        bit = choices & -choices
+        i = bit.bit_length() - 1
+        x, y = i % 9, i // 9
+
+        remaining = empty & ~bit
+        not_bit = ~bit
+        for d in range(9):
+            if not candidates[d] & bit:
+                continue
+
+            new_candidates = [board & not_bit for board in candidates]
+            new_candidates[d] &= ~_PEER_BOARDS[i]
+            new_placed = list(placed)
+            new_placed[d] |= bit
+
+            if self._trace:
+                self.grid.cells[y][x].value = d + 1
+                self._step_complete()
+            elif self._cancel_requested:
+                raise _Cancelled()
+            else:
+                self.stats.steps += 1
+
+            solution = self._search(new_candidates, remaining, new_placed)
+            if solution is not None:
+                return solution
+
+        if self._trace:
+            self.grid.cells[y][x].value = 0
+        self.stats.backtracks += 1
+        return None
+
+
+# Every solver by name, including those provided by other packages through entry points
+ALL_SOLVERS = SolverRegistry()
+ALL_SOLVERS.register("naive", NaiveSolver)
+ALL_SOLVERS.register("backtracing", BacktracingSolver)
+ALL_SOLVERS.register("randomised", RandomisedBacktracingSolver)
+ALL_SOLVERS.register("backjumping", BackjumpingSolver)
+ALL_SOLVERS.register("logical", LogicalSolver)
+ALL_SOLVERS.register("bitboard", BitboardSolver)
+ALL_SOLVERS.register("parallel", "sudokustepper.parallel:ParallelBacktracingSolver", traceable=False,
+                     supports_budgets=False, parallel=True)
+ALL_SOLVERS.register("portfolio", "sudokustepper.portfolio:PortfolioSolver", traceable=False,
+                     supports_budgets=False, parallel=True)
+
+
 def main():
     g = Grid("862341950"
              "573000800"
@@ -145,6 +1126,7 @@ def main():
         print(g)
         print("Valid? {}".format(g.valid))
         print("Solved? {}".format(g.solved))
+    print("Stats: {}".format(s.stats))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compact binary storage of solver step traces, so that a trace can be generated in one place and played back in another
+without re-running the solver.
+
+File layout (all integers little-endian):
+
+    header      magic, format version, flags, keyframe interval, number of steps, number of chunks, index offset
+    original    81 bytes, the cell values (0-9) of the original puzzle; its non-zero cells are the locked cells
+    chunks      one chunk per keyframe interval, each optionally zlib-compressed
+    index       (offset, length) of each chunk
+
+Each chunk holds the full state of its first step (the keyframe), followed by a delta for every other step in the
+chunk: a count, then a (cell index, value) pair for each cell which changed since the previous step. Any step can
+therefore be loaded by decoding a single chunk, whatever the length of the trace.
+"""
+
+import mmap
+import struct
+import zlib
+from typing import Iterable, List, Optional
+
+from sudokustepper.grid import Grid
+
+MAGIC = b"SDKTRACE"
+VERSION = 1
+FILE_EXTENSION = ".sdktrace"
+
+FLAG_COMPRESSED = 0x1
+
+DEFAULT_KEYFRAME_INTERVAL = 256
+
+_HEADER = struct.Struct("<8sHHIQIQ")
+_INDEX_ENTRY = struct.Struct("<QI")
+
+# Translates raw cell values (0-9) to grid string characters
+_TO_DIGITS = bytes.maketrans(bytes(range(10)), b"0123456789")
+
+
+class TraceFormatError(ValueError):
+    pass
+
+
+def _grid_state(grid: Grid) -> bytes:
+    return grid.values
+
+
+def _grid_from_state(state: bytes, unlocked: List[int]) -> Grid:
+    grid = Grid()
+    grid.values = state
+    # Only the original puzzle's cells are locked
+    cells = grid.flattened()
+    for i in unlocked:
+        cells[i].unlock()
+    return grid
+
+
+def _encode_delta(chunk: bytearray, state: bytes, previous_state: bytes) -> None:
+    changes = [(i, value) for i, (value, previous) in enumerate(zip(state, previous_state)) if value != previous]
+    chunk.append(len(changes))
+    for i, value in changes:
+        chunk.append(i)
+        chunk.append(value)
+
+
+def _decode_states(data: bytes) -> List[bytes]:
+    state = bytearray(data[:81])
+    states = [bytes(state)]
+    pos = 81
+    while pos < len(data):
+        num_changes = data[pos]
+        pos += 1
+        for _ in range(num_changes):
+            state[data[pos]] = data[pos + 1]
+            pos += 2
+        states.append(bytes(state))
+    return states
+
+
+class TraceWriter:
+    """
+    Writes a trace file step by step, using constant memory regardless of the number of steps.
+    """
+
+    def __init__(self, path: str, original: Grid, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                 compress: bool = True):
+        """
+        :param path: the file to write
+        :param original: the original puzzle, before any solver steps
+        :param keyframe_interval: the number of steps per chunk; larger values give smaller files, but slower seeking
+        :param compress: set to False to write uncompressed chunks
+        """
+        if keyframe_interval not in range(1, 2 ** 32):
+            raise ValueError("keyframe_interval must be positive")
+
+        self.keyframe_interval = keyframe_interval
+        self.compress = compress
+        self.num_steps = 0
+        self._index: List[tuple] = []
+        self._chunk = bytearray()
+        self._previous_state: Optional[bytes] = None
+
+        self._file = open(path, "wb")
+        self._file.write(b"\0" * _HEADER.size)
+        self._file.write(_grid_state(original))
+
+    def write_step(self, grid: Grid) -> None:
+        state = _grid_state(grid)
+        if self.num_steps % self.keyframe_interval == 0:
+            self._flush_chunk()
+            self._chunk += state
+        else:
+            _encode_delta(self._chunk, state, self._previous_state)
+
+        self._previous_state = state
+        self.num_steps += 1
+
+    def _flush_chunk(self) -> None:
+        if not self._chunk:
+            return
+        data = zlib.compress(bytes(self._chunk)) if self.compress else bytes(self._chunk)
+        self._index.append((self._file.tell(), len(data)))
+        self._file.write(data)
+        self._chunk = bytearray()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+
+        self._flush_chunk()
+        index_offset = self._file.tell()
+        for entry in self._index:
+            self._file.write(_INDEX_ENTRY.pack(*entry))
+
+        flags = FLAG_COMPRESSED if self.compress else 0
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, flags, self.keyframe_interval, self.num_steps, len(self._index),
+                                      index_offset))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def write_trace(path: str, original: Grid, steps: Iterable[Grid], keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                compress: bool = True) -> int:
+    """
+    Writes a complete trace, e.g. a solver's original grid and step history, to a file.
+
+    :returns: the number of steps written
+    """
+    with TraceWriter(path, original, keyframe_interval, compress) as writer:
+        for grid in steps:
+            writer.write_step(grid)
+    return writer.num_steps
+
+
+class TraceReader:
+    """
+    Reads a trace file lazily through a memory map. Behaves as a read-only sequence of Grids, so it can be used in
+    place of Solver.step_history.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise TraceFormatError("not a trace file: {}".format(path))
+
+        if len(self._map) < _HEADER.size + 81:
+            self.close()
+            raise TraceFormatError("not a trace file: {}".format(path))
+
+        magic, version, flags, keyframe_interval, num_steps, num_chunks, index_offset = \
+            _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise TraceFormatError("not a trace file: {}".format(path))
+        if version != VERSION:
+            self.close()
+            raise TraceFormatError("unsupported trace format version {}".format(version))
+
+        # A truncated or corrupted file would otherwise only fail once a step is read
+        index_end = index_offset + num_chunks * _INDEX_ENTRY.size
+        if keyframe_interval == 0 or num_chunks != -(-num_steps // keyframe_interval) or \
+                not _HEADER.size + 81 <= index_offset <= index_end <= len(self._map):
+            self.close()
+            raise TraceFormatError("the trace file is truncated or corrupted: {}".format(path))
+
+        self.keyframe_interval: int = keyframe_interval
+        self.compressed: bool = bool(flags & FLAG_COMPRESSED)
+        self._num_steps: int = num_steps
+        self._num_chunks: int = num_chunks
+        self._index_offset: int = index_offset
+        self._original_state: bytes = self._map[_HEADER.size:_HEADER.size + 81]
+        self._unlocked = [i for i, value in enumerate(self._original_state) if value == 0]
+
+        # The most recently decoded chunk, as a list of step states
+        self._cached_chunk_index: int = -1
+        self._cached_chunk: List[bytes] = []
+
+    @property
+    def original(self) -> Grid:
+        """
+        :returns: the original puzzle, before any solver steps
+        """
+        return Grid(self._original_state.translate(_TO_DIGITS).decode("ascii"))
+
+    def _decode_chunk(self, chunk_index: int) -> List[bytes]:
+        if chunk_index == self._cached_chunk_index:
+            return self._cached_chunk
+
+        offset, length = _INDEX_ENTRY.unpack_from(self._map, self._index_offset + chunk_index * _INDEX_ENTRY.size)
+        if offset + length > self._index_offset:
+            raise TraceFormatError("chunk {} extends past the end of the chunks".format(chunk_index))
+        try:
+            data = self._map[offset:offset + length]
+            if self.compressed:
+                data = zlib.decompress(data)
+            states = _decode_states(data)
+        except (zlib.error, IndexError) as e:
+            raise TraceFormatError("chunk {} is corrupted: {}".format(chunk_index, e))
+
+        # Every chunk but the last holds keyframe_interval steps
+        if chunk_index < self._num_chunks - 1:
+            num_states = self.keyframe_interval
+        else:
+            num_states = self._num_steps - chunk_index * self.keyframe_interval
+        if len(states) != num_states or len(states[0]) != 81:
+            raise TraceFormatError("chunk {} is corrupted: it doesn't hold {} steps".format(chunk_index, num_states))
+        self._cached_chunk_index = chunk_index
+        self._cached_chunk = states
+        return states
+
+    def state(self, step: int) -> bytes:
+        """
+        :param step: the step index, between 0 and len(self) - 1 inclusive
+        :returns: the raw cell values (0-9) at the step, 81 bytes
+        """
+        if step < 0:
+            step += self._num_steps
+        if step not in range(self._num_steps):
+            raise IndexError("step index out of range")
+
+        chunk_index, offset = divmod(step, self.keyframe_interval)
+        return self._decode_chunk(chunk_index)[offset]
+
+    def __getitem__(self, step: int) -> Grid:
+        return _grid_from_state(self.state(step), self._unlocked)
+
+    def __len__(self):
+        return self._num_steps
+
+    def __iter__(self):
+        for step in range(self._num_steps):
+            yield self[step]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CompactStepHistory:
+    """
+    An in-memory step history, stored as uncompressed trace chunks: a keyframe every keyframe_interval steps, and a
+    delta of a few bytes for every other step. This takes a tiny fraction of the memory of a Grid copy per step, and
+    behaves as a sequence of Grids like TraceReader, so it can be used in place of Solver.step_history.
+    """
+
+    def __init__(self, original: Grid, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        """
+        :param original: the original puzzle, whose locked cells stay locked in every step
+        :param keyframe_interval: the number of steps per chunk; larger values use less memory, but slower seeking
+        """
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be positive")
+
+        self.keyframe_interval = keyframe_interval
+        # The size of the stored chunks, in bytes
+        self.nbytes: int = 0
+        self._unlocked = [i for i, cell in enumerate(original.flattened()) if not cell.locked]
+        self._chunks: List[bytearray] = []
+        self._previous_state: Optional[bytes] = None
+        self._num_steps = 0
+
+        self._cached_chunk_index: int = -1
+        self._cached_chunk: List[bytes] = []
+
+    def append(self, grid: Grid) -> None:
+        state = _grid_state(grid)
+        if self._num_steps % self.keyframe_interval == 0:
+            self._chunks.append(bytearray(state))
+            self.nbytes += 81
+        else:
+            chunk = self._chunks[-1]
+            size = len(chunk)
+            _encode_delta(chunk, state, self._previous_state)
+            self.nbytes += len(chunk) - size
+
+        # The last chunk has grown, so its decoded states are out of date
+        if self._cached_chunk_index == len(self._chunks) - 1:
+            self._cached_chunk_index = -1
+        self._previous_state = state
+        self._num_steps += 1
+
+    def extend(self, grids: Iterable[Grid]) -> None:
+        for grid in grids:
+            self.append(grid)
+
+    def state(self, step: int) -> bytes:
+        """
+        :param step: the step index, between 0 and len(self) - 1 inclusive
+        :returns: the raw cell values (0-9) at the step, 81 bytes
+        """
+        if step < 0:
+            step += self._num_steps
+        if step not in range(self._num_steps):
+            raise IndexError("step index out of range")
+
+        chunk_index, offset = divmod(step, self.keyframe_interval)
+        if chunk_index != self._cached_chunk_index:
+            self._cached_chunk = _decode_states(self._chunks[chunk_index])
+            self._cached_chunk_index = chunk_index
+        return self._cached_chunk[offset]
+
+    def __getitem__(self, step: int) -> Grid:
+        return _grid_from_state(self.state(step), self._unlocked)
+
+    def __len__(self):
+        return self._num_steps
+
+    def __iter__(self):
+        for step in range(self._num_steps):
+            yield self[step]
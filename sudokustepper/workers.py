@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+"""
+Helpers for solving in pools of worker processes which can be told to stop: a value in shared memory, handed to each
+worker as it starts, and a watcher which cancels a worker's solver once the value says so.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+# How often (in seconds) a watcher checks whether its solve should stop
+POLL_INTERVAL = 0.01
+
+# Set in each worker process by init_worker: the pool's shared value, e.g. a multiprocessing.RawValue
+shared = None
+
+
+def init_worker(value) -> None:
+    """
+    Pool initializer, storing the value shared by the pool's workers in shared.
+    """
+    global shared
+    shared = value
+
+
+@contextmanager
+def cancel_when(solver, should_stop: Callable[[], bool], interval: float = POLL_INTERVAL):
+    """
+    Context manager which, while the enclosed code runs, checks should_stop from a background thread every interval
+    seconds, and cancels the solver once it returns True.
+
+    :param solver: the solver to cancel
+    :param should_stop: called in the background thread, e.g. to read shared
+    :param interval: the time between checks, in seconds
+    """
+    finished = threading.Event()
+
+    def watch():
+        while not finished.wait(interval):
+            if should_stop():
+                solver.cancel()
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+    try:
+        yield
+    finally:
+        finished.set()
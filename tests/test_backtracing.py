@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from sudokustepper import difftest, kernels
+from sudokustepper.grid import UNITS, Grid
+from sudokustepper.solvers import BackjumpingSolver, BacktracingSolver, RandomisedBacktracingSolver
+from sudokustepper.trace import CompactStepHistory
+
+# A puzzle with a unique solution which takes the randomised search a few restarts with small budgets
+HARD_PUZZLE = "050087209000000504020005760080500000706010000004060300002900070040000000060320400"
+
+# The number of generated puzzles each search is checked on, some of which have no solution
+NUM_PUZZLES = 60
+
+
+def _run(puzzle: str, **options) -> BacktracingSolver:
+    solver = BacktracingSolver(Grid(puzzle), **options)
+    solver.solve()
+    return solver
+
+
+def _trace(solver: BacktracingSolver):
+    return ([grid.grid_string for grid in solver.step_history],
+            [solver.step_description(step) for step in range(solver.num_steps)])
+
+
+def _is_solution(puzzle: str, solution: str) -> bool:
+    return all(p in ("0", s) for p, s in zip(puzzle, solution)) and all(
+        {solution[i] for i in unit} == set("123456789") for unit in UNITS)
+
+
+def _expected(puzzle: str):
+    # The first solution found by the in-order search, or None, as a grid string
+    solution = kernels.py_search(bytes(int(c) for c in puzzle))[0]
+    return None if solution is None else "".join(str(v) for v in solution)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_seed_reproducible(seed):
+    # The same seed gives the same steps, descriptions and counters, restarts included
+    first = _run(HARD_PUZZLE, seed=seed, restart_unit=1)
+    second = _run(HARD_PUZZLE, seed=seed, restart_unit=1)
+    assert _trace(first) == _trace(second)
+    for counter in ("steps", "backtracks", "restarts", "candidate_lookups"):
+        assert getattr(first.stats, counter) == getattr(second.stats, counter), counter
+
+
+def test_seeds_differ():
+    traces = [_trace(_run(HARD_PUZZLE, seed=seed)) for seed in range(3)]
+    assert traces[0] != traces[1] or traces[1] != traces[2]
+
+
+def test_restarts():
+    solver = _run(HARD_PUZZLE, seed=1, restart_unit=1)
+    assert solver.stats.restarts > 0
+    assert solver.grid.grid_string == _expected(HARD_PUZZLE)
+    # Each restart is a step, with the grid cleared back to the puzzle
+    assert _trace(solver)[0].count(HARD_PUZZLE) == solver.stats.restarts
+
+
+def test_randomised_solver_default_seed():
+    solver = RandomisedBacktracingSolver(Grid(HARD_PUZZLE))
+    solver.solve()
+    assert _trace(solver) == _trace(_run(HARD_PUZZLE, seed=0))
+
+
+@pytest.mark.parametrize("restart_unit", [1, None])
+def test_randomised_search_is_complete(restart_unit):
+    # However small its budgets, the search finds a solution if there is one, and only fails if there isn't
+    for puzzle in difftest.corpus(NUM_PUZZLES, seed=3):
+        solver = BacktracingSolver(Grid(puzzle), seed=5, restart_unit=restart_unit, record_steps=False)
+        solved = solver.solve()
+        assert solved == (_expected(puzzle) is not None), puzzle
+        if solved:
+            assert _is_solution(puzzle, solver.grid.grid_string), puzzle
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"nogood_limit": 0},
+    # Small enough that nogoods are forgotten during the search
+    {"nogood_limit": 5},
+    {"seed": 5, "restart_unit": 1},
+], ids=["default", "no-nogoods", "few-nogoods", "randomised"])
+def test_backjumping_is_complete(options):
+    for puzzle in difftest.corpus(NUM_PUZZLES, seed=4):
+        solver = BackjumpingSolver(Grid(puzzle), record_steps=False, **options)
+        solved = solver.solve()
+        assert solved == (_expected(puzzle) is not None), puzzle
+        if solved:
+            assert _is_solution(puzzle, solver.grid.grid_string), puzzle
+        assert len(solver._nogoods) <= solver.nogood_limit
+
+
+def test_backjumping_nogoods_are_sound():
+    # No learnt nogood rules out the unique solution, which would make the search miss it
+    solver = BackjumpingSolver(Grid(HARD_PUZZLE), seed=1)
+    assert solver.solve()
+    solution = {9 * i + int(value) - 1 for i, value in enumerate(solver.grid.grid_string)}
+    assert solver._nogoods
+    for nogood in solver._nogoods:
+        assert not nogood <= solution
+
+    assert solver.stats.backjumps > 0
+    descriptions = _trace(solver)[1]
+    assert any(description and "backjump to" in description for description in descriptions)
+
+
+def test_memory_limit_compacts_history():
+    unlimited = _run(HARD_PUZZLE, seed=1, backjumping=True)
+    # Room for the solver's structures, but not for a Grid copy per step
+    limit = 2 * unlimited._structures_size()
+    assert unlimited._history_bytes > limit
+
+    solver = _run(HARD_PUZZLE, seed=1, backjumping=True, memory_limit=limit)
+    assert isinstance(solver.step_history, CompactStepHistory)
+    assert solver.stats.memory_limit_action in ("compact", "stop")
+
+
+def test_memory_limit_structures():
+    # The solver's structures alone are over the limit, which compacting the history wouldn't help, so recording stops
+    solver = _run(HARD_PUZZLE, seed=1, backjumping=True, memory_limit=1000)
+    assert solver.stats.memory_limit_action == "stop"
+    assert isinstance(solver.step_history, list)
+    assert solver.stats.as_dict()["memory_limit_action"] == "stop"
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+
+import pytest
+
+from sudokustepper import batch, solvers
+
+PUZZLE = "000070500210000048050080120070000300800000052631000080000650004980001600000009003"
+SOLUTION = "498172536217563948356984127572498361849316752631725489123657894984231675765849213"
+CRASHING_PUZZLE = "000000500210000048050080120070000300800000052631000080000650004980001600000009003"
+
+
+class CrashingSolver(solvers.BacktracingSolver):
+    def _solve(self):
+        if self.grid.grid_string == CRASHING_PUZZLE:
+            raise RuntimeError("boom")
+        return super()._solve()
+
+
+@pytest.fixture
+def crashing_solver():
+    solvers.ALL_SOLVERS.register("crashing", CrashingSolver)
+    yield "crashing"
+    del solvers.ALL_SOLVERS["crashing"]
+
+
+def _run(lines, solver_name):
+    out = io.StringIO()
+    batch.run(lines, batch.create_result_writer(out, "jsonl"), solver_name)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_errors_dont_stop_the_run(crashing_solver):
+    invalid = "77" + PUZZLE[2:]
+    records = _run([PUZZLE, CRASHING_PUZZLE, invalid, PUZZLE[:40] + "x" + PUZZLE[41:], PUZZLE], crashing_solver)
+    assert [(r["line"], r["status"]) for r in records] == [
+        (1, "solved"),
+        (2, "error"),
+        (3, "invalid"),
+        (4, "error"),
+        (5, "solved"),
+    ]
+    assert records[0]["solution"] == SOLUTION and records[0]["error"] is None
+    assert records[1]["error"] == "RuntimeError: boom"
+    assert records[2]["error"] == "repeated values at r1c1, r1c2, r1c5, r4c2"
+    assert records[3]["error"] == "unexpected character 'x' on line 4"
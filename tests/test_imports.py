@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The most time, in seconds, that importing the solvers may take without the GUI. It takes about 0.03 s, and the budget
+# leaves room for slow or busy machines while still catching a heavy dependency creeping in; Qt is checked for
+# separately
+IMPORT_TIME_BUDGET = 0.15
+
+# The number of runs, of which the best is checked
+IMPORT_TIME_RUNS = 5
+
+
+def _run(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                          check=True)
+
+
+def test_solvers_import_without_qt():
+    result = _run("import sys, sudokustepper.solvers; print(sorted(m for m in sys.modules if m.startswith('PyQt5')))")
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.mark.skipif(bool(os.environ.get("SUDOKUSTEPPER_SKIP_PERF")), reason="SUDOKUSTEPPER_SKIP_PERF is set")
+def test_solvers_import_time():
+    # The first import may compile the modules, which isn't counted
+    _run("import sudokustepper.solvers")
+
+    best = None
+    for _ in range(IMPORT_TIME_RUNS):
+        result = _run("import sudokustepper.solvers", "-X", "importtime")
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line.split("|")
+            if len(fields) == 3 and fields[1].strip().isdigit():
+                cumulative[fields[2].strip()] = int(fields[1])
+        elapsed = cumulative["sudokustepper.solvers"] / 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    assert best < IMPORT_TIME_BUDGET
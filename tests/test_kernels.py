@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from sudokustepper import kernels, solvers
+from sudokustepper.grid import Grid
+
+# The number of random grids each comparison is made on
+NUM_GRIDS = 500
+
+needs_native = pytest.mark.skipif(not kernels.NATIVE, reason="the compiled kernels haven't been built")
+
+
+def _random_grids(seed: int):
+    # Random values, which are usually invalid
+    rng = random.Random(seed)
+    for _ in range(NUM_GRIDS):
+        yield bytes(rng.choice((0,) * 40 + tuple(range(1, 10))) for _ in range(81))
+
+
+def _random_puzzles(seed: int):
+    # Valid puzzles, made by relabelling the digits of a solution and removing some of its values
+    rng = random.Random(seed)
+    solution = kernels.py_search(bytes(81))[0]
+    for _ in range(NUM_GRIDS):
+        digits = list(range(1, 10))
+        rng.shuffle(digits)
+        puzzle = bytearray(digits[v - 1] for v in solution)
+        for i in rng.sample(range(81), rng.randint(20, 50)):
+            puzzle[i] = 0
+        yield bytes(puzzle)
+
+
+@needs_native
+def test_find_conflicts():
+    for values in _random_grids(0):
+        assert kernels.find_conflicts(values) == kernels.py_find_conflicts(values), values
+
+
+@needs_native
+def test_candidate_masks():
+    for values in _random_grids(1):
+        assert kernels.candidate_masks(values) == kernels.py_candidate_masks(values), values
+
+
+@needs_native
+def test_search():
+    for values in _random_puzzles(2):
+        assert kernels.search(values, 2) == kernels.py_search(values, 2), values
+
+
+@pytest.mark.parametrize("search", [
+    pytest.param(kernels.search, id="native", marks=needs_native),
+    pytest.param(kernels.py_search, id="python"),
+])
+def test_search_cancelled(search):
+    # Counting every solution of the empty grid never finishes, so this only returns once the cancel buffer is seen
+    assert search(bytes(81), 0, bytearray(b"\x01")) is None
+    assert search(bytes(81), 1, bytearray(1)) is not None
+
+
+@needs_native
+def test_backtracing_solver(monkeypatch):
+    # The in-order solver uses the compiled search when it can, which should be indistinguishable from its own search
+    for values in list(_random_puzzles(3))[:50]:
+        puzzle = bytes(v + 48 for v in values).decode("ascii")
+        native = solvers.BacktracingSolver(Grid(puzzle), record_steps=False)
+        native.solve()
+        with monkeypatch.context() as m:
+            m.setattr(kernels, "NATIVE", False)
+            python = solvers.BacktracingSolver(Grid(puzzle), record_steps=False)
+            python.solve()
+
+        assert native.grid.grid_string == python.grid.grid_string
+        for counter in ("steps", "backtracks", "validations", "candidate_lookups"):
+            assert getattr(native.stats, counter) == getattr(python.stats, counter), (puzzle, counter)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from sudokustepper import kernels
+from sudokustepper.grid import ALL_CANDIDATES, UNITS, Grid
+from sudokustepper.solvers import LogicalSolver
+
+# Puzzles with a unique solution, each needing the given technique at most, and the grade it gives
+GRADED_PUZZLES = [
+    ("340000000009006000000570006000002000002095300010000780000603050520000000060000018", "naked single", "easy"),
+    ("030060007200000091058009002910075000000010050000300060400001005000007934080000000", "hidden single", "easy"),
+    ("000080004703000500590000000007001005050000300004800072000067010230900000000010900", "pointing", "medium"),
+    ("604005000500800003000300020463008000007519000000000000075000060000000180090403200", "claiming", "medium"),
+    ("005000702070050490908000030090640007000030060000001050720400000806700509009000000", "naked pair", "medium"),
+    ("080005000000600000002000930510000000004830050000007004078100206050020098020000000", "hidden pair", "hard"),
+    ("050087209000000504020005760080500000706010000004060300002900070040000000060320400", "x-wing", "expert"),
+]
+
+# A puzzle with a unique solution which the techniques can't finish
+UNGRADED_PUZZLE = "006000200000005138000400007030520070050000800000008620020007380008009000004100000"
+
+
+def _solution(puzzle: str) -> bytes:
+    return kernels.py_search(bytes(int(c) for c in puzzle))[0]
+
+
+def _check_sound(solver: LogicalSolver, solution: bytes) -> None:
+    # Every placement agrees with the solution, and no elimination removes the solution's value
+    for deduction in solver.deductions:
+        for i, d in deduction.placements:
+            assert solution[i] == d, deduction
+        for i, d in deduction.eliminations:
+            assert solution[i] != d, deduction
+
+
+@pytest.mark.parametrize("puzzle, technique, grade", GRADED_PUZZLES, ids=[t for _, t, _ in GRADED_PUZZLES])
+def test_grade(puzzle, technique, grade):
+    solver = LogicalSolver(Grid(puzzle))
+    assert solver.solve()
+    solution = _solution(puzzle)
+    assert solver.grid.values == solution
+    assert solver.grade == grade
+    assert technique in solver.technique_counts
+    _check_sound(solver, solution)
+
+    # One step per deduction, each described
+    assert solver.num_steps == len(solver.deductions) == sum(solver.technique_counts.values())
+    assert solver.step_description(1) == str(solver.deductions[0])
+
+
+def test_ungraded():
+    solver = LogicalSolver(Grid(UNGRADED_PUZZLE))
+    assert not solver.solve()
+    assert solver.grade is None
+    _check_sound(solver, _solution(UNGRADED_PUZZLE))
+
+
+def _solver(candidates) -> LogicalSolver:
+    # A solver of the empty grid, with the candidates set directly
+    solver = LogicalSolver(Grid())
+    solver.candidates = list(candidates)
+    return solver
+
+
+def _without(candidates, cells, d: int):
+    # Removes d from the candidates of the cells
+    for i in cells:
+        candidates[i] &= ~(1 << (d - 1))
+
+
+def test_pointing():
+    # 2 is confined to the first row within box 1, so it can be removed from the rest of the row
+    candidates = [ALL_CANDIDATES] * 81
+    _without(candidates, [9, 10, 11, 18, 19, 20], 2)
+    deduction = _solver(candidates)._find_pointing()
+    assert deduction.technique == "pointing"
+    assert deduction.eliminations == [(i, 2) for i in range(3, 9)]
+
+
+def test_claiming():
+    # 3 is confined to box 1 within the first row, so it can be removed from the rest of the box
+    candidates = [ALL_CANDIDATES] * 81
+    _without(candidates, range(3, 9), 3)
+    deduction = _solver(candidates)._find_claiming()
+    assert deduction.technique == "claiming"
+    assert deduction.eliminations == [(i, 3) for i in (9, 10, 11, 18, 19, 20)]
+
+
+def test_naked_pair():
+    # The first two cells can only be 3 or 4, so the rest of the row can't be
+    candidates = [ALL_CANDIDATES] * 81
+    candidates[0] = candidates[1] = 0b1100
+    deduction = _solver(candidates)._find_naked_pair()
+    assert deduction.technique == "naked pair"
+    assert deduction.eliminations == [(i, d) for i in range(2, 9) for d in (3, 4)]
+
+
+def test_hidden_pair():
+    # 5 and 6 can only go in the first two cells of the row, so those cells can't be anything else
+    candidates = [ALL_CANDIDATES] * 81
+    _without(candidates, range(2, 9), 5)
+    _without(candidates, range(2, 9), 6)
+    deduction = _solver(candidates)._find_hidden_pair()
+    assert deduction.technique == "hidden pair"
+    assert deduction.eliminations == [(i, d) for i in (0, 1) for d in (1, 2, 3, 4, 7, 8, 9)]
+
+
+@pytest.mark.parametrize("rows, columns, find", [
+    ((0, 4), (1, 5), "_find_x_wing"),
+    ((0, 3, 6), (0, 3, 6), "_find_swordfish"),
+])
+def test_fish(rows, columns, find):
+    # 4 is confined to the same columns in the rows, so it can be removed from the rest of those columns
+    candidates = [ALL_CANDIDATES] * 81
+    for row in rows:
+        _without(candidates, [9 * row + x for x in range(9) if x not in columns], 4)
+    deduction = getattr(_solver(candidates), find)()
+    assert deduction.eliminations == [(i, 4) for x in columns for i in UNITS[9 + x] if i // 9 not in rows]
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from sudokustepper.parse import parse_grid, parse_records, to_grid_string
+
+PUZZLE = "000070500210000048050080120070000300800000052631000080000650004980001600000009003"
+OTHER = "000200700007509300000004089040050010602400000095000607061007908874090000509010000"
+
+
+def _rows(puzzle: str):
+    return [puzzle[i:i + 9] for i in range(0, 81, 9)]
+
+
+def _parse(lines):
+    # (line number, puzzle as a grid string or None, error or None) for each record
+    return [(n, values and to_grid_string(values), error) for n, _, values, error in parse_records(lines)]
+
+
+def test_one_puzzle_per_line():
+    assert _parse([PUZZLE, "", "# a comment", OTHER.replace("0", ".")]) == [(1, PUZZLE, None), (4, OTHER, None)]
+
+
+def test_nine_rows():
+    assert _parse(_rows(PUZZLE) + _rows(OTHER)) == [(1, PUZZLE, None), (10, OTHER, None)]
+
+
+def test_first_row_of_spaces():
+    # A row of nine spaces is a row of empty cells, not a blank line, even at the start of a puzzle
+    puzzle = "0" * 9 + PUZZLE[9:]
+    assert _parse([" " * 9] + _rows(puzzle)[1:]) == [(1, puzzle, None)]
+
+
+def test_bad_character_resyncs_after_the_puzzle():
+    # An error on the third row skips the rest of that puzzle only, so the puzzles directly after it are still read
+    rows = _rows(PUZZLE)
+    rows[2] = "05x080120"
+    records = _parse(rows + _rows(OTHER) + _rows(PUZZLE))
+    assert records == [
+        (1, None, "unexpected character 'x' on line 3"),
+        (10, OTHER, None),
+        (19, PUZZLE, None),
+    ]
+
+
+def test_bad_character_on_one_line():
+    # A malformed one-line puzzle doesn't swallow the short lines after it
+    records = _parse([PUZZLE[:40] + "x" + PUZZLE[41:]] + _rows(OTHER))
+    assert records == [(1, None, "unexpected character 'x' on line 1"), (2, OTHER, None)]
+
+
+def test_too_many_cells():
+    rows = _rows(PUZZLE)
+    rows[4] += "0"
+    assert _parse(rows + _rows(OTHER)) == [(1, None, "too many cells: 82 on lines 1-9"), (10, OTHER, None)]
+
+
+def test_short_lines_are_their_own_records():
+    # Lines of 80, 79 and 80 cells aren't merged into one puzzle
+    records = _parse([PUZZLE[:80], PUZZLE[:79], PUZZLE[:80], OTHER])
+    assert [error for _, _, error in records] == [
+        "incomplete grid: 80 of 81 cells",
+        "incomplete grid: 79 of 81 cells",
+        "incomplete grid: 80 of 81 cells",
+        None,
+    ]
+    assert records[3] == (4, OTHER, None)
+
+
+def test_repeated_values():
+    puzzle = "7" + PUZZLE[1:]
+    assert _parse([puzzle]) == [(1, None, "repeated values at r1c1, r1c5")]
+    assert to_grid_string(parse_grid(puzzle)) == puzzle
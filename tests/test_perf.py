@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Timings are unreliable on shared or throttled machines, so the check can be turned off, e.g. on CI
+pytestmark = pytest.mark.skipif(bool(os.environ.get("SUDOKUSTEPPER_SKIP_PERF")),
+                                reason="SUDOKUSTEPPER_SKIP_PERF is set")
+
+
+def test_no_slowdown():
+    # Runs perf.check() in a fresh interpreter, as when the baseline was recorded: the larger heap of the test process
+    # slows the object-heavy solvers down by itself
+    result = subprocess.run([sys.executable, "-m", "sudokustepper.perf"], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from sudokustepper.grid import Grid
+from sudokustepper.portfolio import MIN_SAMPLES, LatencyModel, PortfolioSolver, bucket, features
+
+PUZZLE = "000070500210000048050080120070000300800000052631000080000650004980001600000009003"
+SOLUTION = "498172536217563948356984127572498361849316752631725489123657894984231675765849213"
+
+
+def test_save_merges(tmp_path):
+    # Two processes' models, loaded from the same file, each keep the other's solves on saving
+    path = str(tmp_path / "model.json")
+    LatencyModel().save(path)
+    first = LatencyModel()
+    first.load(path)
+    second = LatencyModel()
+    second.load(path)
+
+    first.record("0:0", "bitboard", 1.0, True)
+    second.record("0:0", "bitboard", 2.0, False)
+    second.record("1:0", "logical", 3.0, True)
+    first.save(path)
+    second.save(path)
+    assert not second.modified
+
+    saved = LatencyModel()
+    saved.load(path)
+    assert saved.buckets == {"0:0": {"bitboard": [2, 3.0, 1]}, "1:0": {"logical": [1, 3.0, 0]}}
+    assert second.buckets == saved.buckets
+
+    # Saving again adds nothing
+    first.save(path)
+    saved.load(path)
+    assert saved.samples("0:0", "bitboard") == 2
+
+
+def test_explores_every_engine():
+    # With an empty model, each engine gets MIN_SAMPLES solves of the bucket, so that all of them can be ranked
+    model = LatencyModel()
+    engines = PortfolioSolver.engines()
+    for _ in range(MIN_SAMPLES * len(engines)):
+        solver = PortfolioSolver(Grid(PUZZLE), model=model, race=False)
+        assert solver.solve()
+        assert solver.grid.grid_string == SOLUTION
+
+    key = bucket(*features(Grid(PUZZLE)))
+    assert sorted(engine for _, engine in model.ranking(key, engines)) == sorted(engines)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from sudokustepper.grid import Grid
+from sudokustepper.solvers import BacktracingSolver
+from sudokustepper.trace import CompactStepHistory, TraceFormatError, TraceReader, TraceWriter, write_trace
+
+PUZZLE = "000070500210000048050080120070000300800000052631000080000650004980001600000009003"
+
+
+@pytest.fixture(scope="module")
+def solved():
+    solver = BacktracingSolver(Grid(PUZZLE))
+    assert solver.solve()
+    return solver
+
+
+def _locked(grid: Grid):
+    return [cell.locked for cell in grid.flattened()]
+
+
+@pytest.mark.parametrize("keyframe_interval", [1, 7, 256])
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip(tmp_path, solved, keyframe_interval, compress):
+    path = str(tmp_path / "steps.sdktrace")
+    assert write_trace(path, Grid(PUZZLE), solved.step_history, keyframe_interval, compress) == solved.num_steps
+
+    with TraceReader(path) as reader:
+        assert reader.original.grid_string == PUZZLE
+        assert len(reader) == solved.num_steps
+        # Read backwards, so that each chunk is decoded afresh rather than from the cache
+        for step in reversed(range(len(reader))):
+            assert reader[step].grid_string == solved.step_history[step].grid_string
+        assert _locked(reader[-1]) == _locked(Grid(PUZZLE))
+
+
+def test_empty_trace(tmp_path):
+    path = str(tmp_path / "empty.sdktrace")
+    with TraceWriter(path, Grid(PUZZLE)):
+        pass
+    with TraceReader(path) as reader:
+        assert len(reader) == 0
+        with pytest.raises(IndexError):
+            reader.state(0)
+
+
+def test_compact_step_history(solved):
+    history = CompactStepHistory(Grid(PUZZLE), keyframe_interval=16)
+    history.extend(solved.step_history)
+    assert len(history) == solved.num_steps
+    assert [grid.grid_string for grid in history] == [grid.grid_string for grid in solved.step_history]
+
+
+def test_not_a_trace(tmp_path):
+    path = tmp_path / "puzzle.txt"
+    path.write_text(PUZZLE * 2)
+    with pytest.raises(TraceFormatError):
+        TraceReader(str(path))
+
+
+def test_truncated(tmp_path, solved):
+    path = str(tmp_path / "steps.sdktrace")
+    write_trace(path, Grid(PUZZLE), solved.step_history, keyframe_interval=16)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # Every truncation is reported, either on opening or on reading a step, rather than giving wrong steps
+    truncated_path = str(tmp_path / "truncated.sdktrace")
+    for size in sorted({0, 1, 20, 60, 120, len(data) // 2, len(data) - 13, len(data) - 1}):
+        with open(truncated_path, "wb") as f:
+            f.write(data[:size])
+        with pytest.raises(TraceFormatError):
+            with TraceReader(truncated_path) as reader:
+                for step in range(len(reader)):
+                    reader.state(step)
+
+
+def test_corrupted_chunk(tmp_path, solved):
+    path = str(tmp_path / "steps.sdktrace")
+    write_trace(path, Grid(PUZZLE), solved.step_history, keyframe_interval=16)
+    with open(path, "r+b") as f:
+        # A third of the way in, which is among the compressed chunks
+        f.seek(os.path.getsize(path) // 3)
+        f.write(b"\xff" * 8)
+
+    with TraceReader(path) as reader:
+        with pytest.raises(TraceFormatError):
+            for step in range(len(reader)):
+                reader.state(step)